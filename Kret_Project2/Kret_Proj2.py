@@ -5,10 +5,639 @@
 #This exercise is about using numpy and pandas to analyze data.
 
 #Part I
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
 import numpy as np
 import pandas as pd
 
-def calculate_fluid_statistics(root_dir):
+try:
+    import pyarrow  # noqa: F401  (enables the Parquet cache)
+    HAVE_PARQUET = True
+except ImportError:
+    HAVE_PARQUET = False
+
+#explicit column types for every exercise_data table; ids are nullable (some CSVs have blank keys)
+#and low-cardinality text is categorical
+TABLE_DTYPES = {
+    'fluids': {'fluid_id': 'Int64', 'fluid_name': 'category', 'density': 'float64',
+               'viscosity': 'float64', 'specific_heat': 'float64'},
+    'experiments': {'experiment_id': 'Int64', 'experiment_name': 'category', 'fluid_id': 'Int64',
+                    'experiment_date': 'datetime64[ns]', 'description': 'string'},
+    'fluid_measurements': {'measurement_id': 'Int64', 'experiment_id': 'Int64', 'pressure': 'float64',
+                           'velocity': 'float64', 'temperature': 'float64', 'flow_rate': 'float64'},
+    'applications': {'application_id': 'Int64', 'application_name': 'category', 'description': 'string',
+                     'fluid_id': 'Int64'},
+    'systems': {'system_id': 'Int64', 'system_name': 'string', 'system_type': 'category', 'description': 'string'},
+    'sensors': {'sensor_id': 'Int64', 'sensor_name': 'string', 'sensor_type': 'category', 'unit': 'category',
+                'system_id': 'Int64'},
+    'measurements': {'measurement_id': 'Int64', 'sensor_id': 'Int64', 'timestamp': 'datetime64[ns]',
+                     'value': 'float64'},
+    'signal_data': {'signal_id': 'Int64', 'sensor_id': 'Int64', 'timestamp': 'datetime64[ns]', 'value': 'float64'},
+    'signal_characteristics': {'characteristic_id': 'Int64', 'sensor_id': 'Int64', 'frequency': 'float64',
+                               'amplitude': 'float64', 'signal_type': 'category'},
+    'control_actions': {'action_id': 'Int64', 'system_id': 'Int64', 'action_type': 'category',
+                        'action_value': 'float64', 'timestamp': 'datetime64[ns]'},
+}
+
+#primary key and foreign keys (column -> referenced table) of every table, from the ERDs
+TABLE_KEYS = {
+    'fluids': ('fluid_id', {}),
+    'experiments': ('experiment_id', {'fluid_id': 'fluids'}),
+    'fluid_measurements': ('measurement_id', {'experiment_id': 'experiments'}),
+    'applications': ('application_id', {'fluid_id': 'fluids'}),
+    'systems': ('system_id', {}),
+    'sensors': ('sensor_id', {'system_id': 'systems'}),
+    'measurements': ('measurement_id', {'sensor_id': 'sensors'}),
+    'signal_data': ('signal_id', {'sensor_id': 'sensors'}),
+    'signal_characteristics': ('characteristic_id', {'sensor_id': 'sensors'}),
+    'control_actions': ('action_id', {'system_id': 'systems'}),
+}
+
+MEASURED_QUANTITIES = ['pressure', 'velocity', 'temperature', 'flow_rate']
+FLUID_STATS_DTYPE = [('fluid_id', 'i4'), ('fluid_name', 'U50')] + [
+    (f'{quantity}_{stat}', 'f8') for quantity in MEASURED_QUANTITIES for stat in ('mean', 'median', 'std')]
+
+def _group_moments(group_ids, values):
+    """
+    Sort rows by group and calculate count, mean and sum of squared deviations (M2) per group.
+
+    NaN values are skipped like pandas does: counts are per column, and a
+    group/column without any valid value gets a NaN mean.
+
+    Parameters:
+    group_ids (np.ndarray): Integer group key of each row.
+    values (np.ndarray): 2-D float array, one column per quantity.
+
+    Returns:
+    tuple: (groups, starts, counts, mean, m2, sorted group_ids, sorted values) where counts,
+        mean and m2 are 2-D arrays with one row per group and one column per quantity.
+    """
+    order = np.argsort(group_ids, kind='stable')
+    group_ids = group_ids[order]
+    values = values[order]
+    groups, starts, rows = np.unique(group_ids, return_index=True, return_counts=True)
+
+    valid = ~np.isnan(values)
+    counts = np.add.reduceat(valid.astype(np.int64), starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0) / counts
+    squared_dev = np.where(valid, (values - np.repeat(mean, rows, axis=0)) ** 2, 0.0)
+    m2 = np.add.reduceat(squared_dev, starts, axis=0)
+    return groups, starts, counts, mean, m2, group_ids, values
+
+def _grouped_statistics(group_ids, values):
+    """
+    Calculate mean, median and sample std of each column per group without pandas.
+
+    Rows are sorted by group once; sums come from np.add.reduceat over the
+    contiguous groups and medians from the middle elements of each group
+    after a per-column (group, value) sort. NaN values are skipped like pandas.
+
+    Parameters:
+    group_ids (np.ndarray): Integer group key of each row.
+    values (np.ndarray): 2-D float array, one column per quantity.
+
+    Returns:
+    tuple: (groups, mean, median, std) where groups holds the sorted unique keys and
+        the statistics are 2-D arrays with one row per group.
+    """
+    groups, starts, counts, mean, m2, group_ids, values = _group_moments(group_ids, values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(m2 / (counts - 1))
+
+    median = np.full_like(mean, np.nan)
+    for j in range(values.shape[1]):
+        # rows are already grouped, so sorting by (group, value) only reorders within groups;
+        # NaN sorts last, so the valid values of each group come first
+        column = values[np.lexsort((values[:, j], group_ids)), j]
+        count = counts[:, j]
+        has_values = count > 0
+        lower = (starts + (count - 1) // 2)[has_values]
+        upper = (starts + count // 2)[has_values]
+        median[has_values, j] = (column[lower] + column[upper]) / 2
+
+    return groups, mean, median, std
+
+def _experiment_fluid_lookup(experiments):
+    """
+    Build a dense experiment_id -> fluid_id array, -1 where an experiment has no fluid.
+
+    Parameters:
+    experiments (pd.DataFrame): Table with experiment_id and fluid_id columns.
+
+    Returns:
+    np.ndarray: Lookup array indexed by experiment_id.
+    """
+    experiments = experiments.dropna()
+    exp_ids = experiments['experiment_id'].to_numpy(dtype=np.int64)
+    exp_to_fluid = np.full(exp_ids.max(initial=-1) + 1, -1, dtype=np.int64)
+    exp_to_fluid[exp_ids] = experiments['fluid_id'].to_numpy(dtype=np.int64)
+    return exp_to_fluid
+
+def _lookup_fluid_ids(exp_to_fluid, experiment_ids):
+    # fluid_id of each measurement, -1 for unknown experiments
+    experiment_ids = np.asarray(experiment_ids, dtype=np.int64)
+    known = (experiment_ids >= 0) & (experiment_ids < len(exp_to_fluid))
+    fluid_ids = np.full(len(experiment_ids), -1, dtype=np.int64)
+    fluid_ids[known] = exp_to_fluid[experiment_ids[known]]
+    return fluid_ids
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a relative error bound (logarithmic buckets, as in DDSketch).
+
+    Each value x is counted in the bucket ceil(log_gamma(|x|)) of its sign, with
+    gamma = (1 + relative_error) / (1 - relative_error), so any quantile is
+    returned within relative_error of a true sample value. Sketches merge by
+    adding bucket counts, and memory grows with the number of buckets in use
+    (the log of the value range), not with the number of values.
+    """
+
+    def __init__(self, relative_error=0.005):
+        self.relative_error = relative_error
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self.log_gamma = np.log(self.gamma)
+        self.counts = {}
+
+    def add(self, group_ids, values):
+        """
+        Count a 2-D block of values (one column per quantity) into each row's group.
+
+        Parameters:
+        group_ids (np.ndarray): Integer group key of each row.
+        values (np.ndarray): 2-D float array; NaN values are ignored.
+        """
+        group_ids = np.asarray(group_ids, dtype=np.int64)
+        rows, columns = np.nonzero(~np.isnan(values))
+        if not len(rows):
+            return
+        x = values[rows, columns]
+        sign = np.sign(x).astype(np.int64)
+        with np.errstate(divide='ignore'):
+            bucket = np.where(sign != 0, np.ceil(np.log(np.abs(x)) / self.log_gamma), 0).astype(np.int64)
+
+        #pack (group, column, sign, bucket) into one int64 so a 1-D unique can count the keys
+        low = bucket.min()
+        width = bucket.max() - low + 1
+        slots = 3 * values.shape[1]
+        keys = (group_ids[rows] * slots + columns * 3 + sign + 1) * width + (bucket - low)
+        unique_keys, counts = np.unique(keys, return_counts=True)
+
+        slot, bucket = np.divmod(unique_keys, width)
+        group, slot = np.divmod(slot, slots)
+        column, sign = np.divmod(slot, 3)
+        unique_keys = zip(group.tolist(), column.tolist(), (sign - 1).tolist(), (bucket + low).tolist())
+        for key, count in zip(unique_keys, counts.tolist()):
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    def merge(self, other):
+        """
+        Add the counts of another sketch with the same relative error into this one.
+
+        Parameters:
+        other (QuantileSketch): Sketch to merge in.
+        """
+        if other.gamma != self.gamma:
+            raise ValueError("Only sketches with the same relative error can be merged.")
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    def quantiles(self, groups, n_columns, q=0.5):
+        """
+        Estimate a quantile for every (group, column), interpolating between ranks like pandas.
+
+        Parameters:
+        groups (np.ndarray): Group keys to report, one output row each.
+        n_columns (int): Number of value columns.
+        q (float): Quantile in [0, 1]; 0.5 gives the median.
+
+        Returns:
+        np.ndarray: 2-D array of estimates, NaN where a group/column has no values.
+        """
+        buckets = {}
+        for (group, column, sign, bucket), count in self.counts.items():
+            value = sign * 2 * self.gamma ** bucket / (self.gamma + 1) if sign else 0.0
+            buckets.setdefault((group, column), []).append((value, count))
+
+        result = np.full((len(groups), n_columns), np.nan)
+        for i, group in enumerate(np.asarray(groups).tolist()):
+            for j in range(n_columns):
+                items = sorted(buckets.get((group, j), []))
+                if not items:
+                    continue
+                values = np.array([value for value, count in items])
+                cumulative = np.cumsum([count for value, count in items])
+                rank = q * (cumulative[-1] - 1)
+                lower = values[np.searchsorted(cumulative, np.floor(rank), side='right')]
+                upper = values[np.searchsorted(cumulative, np.ceil(rank), side='right')]
+                result[i, j] = lower + (upper - lower) * (rank - np.floor(rank))
+        return result
+
+def stream_fluid_statistics(root_dir, chunksize=1000000, relative_error=0.005):
+    """
+    Calculate per-fluid statistics reading fluid_measurements.csv in bounded memory.
+
+    Measurements are read chunksize rows at a time. Each chunk's per-fluid
+    count, mean and M2 (per quantity, NaN values skipped) are merged into
+    running accumulators with Chan's parallel update, and the values are
+    counted into a QuantileSketch, so memory depends on the number of
+    fluids and sketch buckets only.
+
+    Parameters:
+    root_dir (str): The root directory containing the CSV files.
+    chunksize (int): Number of measurement rows read per chunk.
+    relative_error (float): Relative error bound of the median estimates.
+
+    Returns:
+    tuple: (groups, stats) where groups holds the fluid ids and stats maps
+        'mean', 'median' and 'std' to 2-D arrays (one row per fluid, one column per quantity).
+    """
+    experiments = read_typed_csv(root_dir, 'experiments', ['experiment_id', 'fluid_id'])
+    exp_to_fluid = _experiment_fluid_lookup(experiments)
+    n_groups = exp_to_fluid.max(initial=-1) + 1
+    n_quantities = len(MEASURED_QUANTITIES)
+
+    #rows per fluid, and valid (non-NaN) values per fluid and quantity
+    rows = np.zeros(n_groups, dtype=np.int64)
+    count = np.zeros((n_groups, n_quantities), dtype=np.int64)
+    mean = np.zeros((n_groups, n_quantities))
+    m2 = np.zeros((n_groups, n_quantities))
+    sketch = QuantileSketch(relative_error)
+
+    reader = pd.read_csv(os.path.join(root_dir, 'fluid_measurements.csv'),
+                         usecols=['experiment_id'] + MEASURED_QUANTITIES, chunksize=chunksize)
+    for chunk in reader:
+        fluid_ids = _lookup_fluid_ids(exp_to_fluid, chunk['experiment_id'].to_numpy(dtype=np.int64, na_value=-1))
+        keep = fluid_ids >= 0
+        if not keep.any():
+            continue
+        values = chunk[MEASURED_QUANTITIES].to_numpy(dtype=np.float64)[keep]
+        groups, starts, chunk_count, chunk_mean, chunk_m2, _, _ = _group_moments(fluid_ids[keep], values)
+
+        #Chan et al. merge of per-column (count, mean, M2) accumulators; columns with
+        #no valid values in this chunk are left as they are
+        prior = count[groups]
+        total = prior + chunk_count
+        seen = chunk_count > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = np.where(seen, chunk_mean - mean[groups], 0.0)
+            m2[groups] += np.where(seen, chunk_m2 + delta ** 2 * prior * chunk_count / total, 0.0)
+            mean[groups] += np.where(seen, delta * chunk_count / total, 0.0)
+        count[groups] += chunk_count
+        rows[groups] += np.diff(np.append(starts, len(values)))
+
+        sketch.add(fluid_ids[keep], values)
+
+    groups = np.flatnonzero(rows)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(m2[groups] / (count[groups] - 1))
+    stats = {'mean': np.where(count[groups] > 0, mean[groups], np.nan),
+             'median': sketch.quantiles(groups, n_quantities), 'std': std}
+    return groups, stats
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _write_json(path, obj):
+    with open(path, 'w') as file:
+        json.dump(obj, file)
+
+def _write_atomic(path, write):
+    """
+    Write a file through a temporary file in the same directory and swap it in with os.replace.
+
+    Readers (and concurrent writers) only ever see the old or the complete new file.
+    The file gets the usual permissions for a new file (0666 minus the umask)
+    instead of the 0600 that mkstemp creates.
+
+    Parameters:
+    path (str): Final file path.
+    write (callable): Called with the temporary path to produce the file contents.
+    """
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.' + os.path.basename(path) + '.')
+    os.close(handle)
+    try:
+        write(temp_path)
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _source_is_fresh(csv_path, meta):
+    """
+    Check whether data built from a CSV is still current.
+
+    Size and mtime are compared first; if only the mtime changed, the CSV's
+    SHA-256 decides, and on a match meta['mtime_ns'] is updated in place.
+
+    Parameters:
+    csv_path (str): The source CSV.
+    meta (dict): The recorded 'size', 'mtime_ns' and 'sha256', or None if nothing was built yet.
+
+    Returns:
+    bool: True if the built data can be reused.
+    """
+    if meta is None:
+        return False
+    stat = os.stat(csv_path)
+    if meta['size'] != stat.st_size:
+        return False
+    if meta['mtime_ns'] == stat.st_mtime_ns:
+        return True
+    #touched but maybe not changed: fall back to comparing content hashes
+    if meta['sha256'] != _file_sha256(csv_path):
+        return False
+    meta['mtime_ns'] = stat.st_mtime_ns
+    return True
+
+def read_typed_csv(root_dir, table, columns=None):
+    """
+    Read one exercise_data CSV with the explicit column types from TABLE_DTYPES.
+
+    Parameters:
+    root_dir (str): The root directory containing the CSV files.
+    table (str): Table name, e.g. 'fluids'.
+    columns (list): Columns to read, all if None.
+
+    Returns:
+    pd.DataFrame: The typed table.
+    """
+    dtypes = TABLE_DTYPES[table]
+    if columns is not None:
+        dtypes = {column: dtypes[column] for column in columns}
+    dates = [column for column, dtype in dtypes.items() if dtype.startswith('datetime')]
+    data = pd.read_csv(os.path.join(root_dir, table + '.csv'), usecols=list(dtypes),
+                       dtype={column: dtype for column, dtype in dtypes.items() if column not in dates},
+                       parse_dates=dates)[list(dtypes)]
+    for column in dates:
+        data[column] = data[column].astype(dtypes[column])
+    return data
+
+def load_table(root_dir, table, columns=None, cache_dir=None):
+    """
+    Load an exercise_data table through a typed columnar cache.
+
+    The first load converts the CSV once into a Parquet file (or a pickle if
+    pyarrow is not installed) in cache_dir. Later loads reuse it while the
+    CSV's size and mtime are unchanged; if only the mtime changed, the cache
+    is kept when the CSV's SHA-256 still matches. With Parquet only the
+    requested columns are read from disk.
+
+    Parameters:
+    root_dir (str): The root directory containing the CSV files.
+    table (str): Table name, e.g. 'fluid_measurements'.
+    columns (list): Columns to load, all if None.
+    cache_dir (str): Where cache files are kept, root_dir/.cache if None.
+
+    Returns:
+    pd.DataFrame: The typed table (or the requested columns of it).
+    """
+    csv_path = os.path.join(root_dir, table + '.csv')
+    cache_dir = cache_dir or os.path.join(root_dir, '.cache')
+    cache_path = os.path.join(cache_dir, table + ('.parquet' if HAVE_PARQUET else '.pkl'))
+    meta_path = os.path.join(cache_dir, table + '.meta.json')
+
+    meta = None
+    if os.path.exists(cache_path) and os.path.exists(meta_path):
+        with open(meta_path) as file:
+            meta = json.load(file)
+    mtime_ns = meta and meta['mtime_ns']
+    fresh = _source_is_fresh(csv_path, meta)
+    if fresh and meta['mtime_ns'] != mtime_ns:
+        _write_atomic(meta_path, lambda path: _write_json(path, meta))
+
+    if not fresh:
+        stat = os.stat(csv_path)
+        data = read_typed_csv(root_dir, table)
+        os.makedirs(cache_dir, exist_ok=True)
+        #data first and meta last, each swapped in whole, so a meta file never vouches for a partial cache
+        if HAVE_PARQUET:
+            _write_atomic(cache_path, lambda path: data.to_parquet(path, index=False))
+        else:
+            _write_atomic(cache_path, data.to_pickle)
+        _write_atomic(meta_path, lambda path: _write_json(
+            path, {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': _file_sha256(csv_path)}))
+        return data if columns is None else data[list(columns)]
+
+    if HAVE_PARQUET:
+        return pd.read_parquet(cache_path, columns=None if columns is None else list(columns))
+    data = pd.read_pickle(cache_path)
+    return data if columns is None else data[list(columns)]
+
+SQL_TYPES = {'Int64': 'INTEGER', 'float64': 'REAL', 'datetime64[ns]': 'INTEGER'}
+
+def _create_table_sql(table):
+    """
+    Build the CREATE TABLE statement for one exercise_data table.
+
+    Timestamps are stored as INTEGER nanoseconds since the epoch (the same
+    int64 values SensorSeries works with), so range filters and bucketing
+    stay integer comparisons. The primary key is declared INT rather than
+    INTEGER so it is not a rowid alias: the CSVs contain blank keys and those
+    rows are kept as NULL instead of being given an invented id.
+
+    Parameters:
+    table (str): Table name, e.g. 'sensors'.
+
+    Returns:
+    str: The SQL statement.
+    """
+    primary_key, foreign_keys = TABLE_KEYS[table]
+    columns = []
+    for column, dtype in TABLE_DTYPES[table].items():
+        definition = f'{column} {"INT" if column == primary_key else SQL_TYPES.get(dtype, "TEXT")}'
+        if column == primary_key:
+            definition += ' PRIMARY KEY'
+        elif column in foreign_keys:
+            definition += f' REFERENCES {foreign_keys[column]}({TABLE_KEYS[foreign_keys[column]][0]})'
+        columns.append(definition)
+    return f'CREATE TABLE {table} ({", ".join(columns)})'
+
+def _create_index_sql(table):
+    """
+    Build the CREATE INDEX statements for the foreign key and timestamp columns of one table.
+
+    Parameters:
+    table (str): Table name, e.g. 'measurements'.
+
+    Returns:
+    list: SQL statements; a table with both a foreign key and a timestamp gets one
+        (foreign key, timestamp) index, which also serves lookups on the foreign key alone.
+    """
+    foreign_keys = list(TABLE_KEYS[table][1])
+    dates = [column for column, dtype in TABLE_DTYPES[table].items() if dtype.startswith('datetime')]
+    statements = []
+    for column in foreign_keys:
+        indexed = ', '.join([column] + dates)
+        statements.append(f'CREATE INDEX idx_{table}_{column} ON {table} ({indexed})')
+    for column in dates:
+        statements.append(f'CREATE INDEX idx_{table}_{column} ON {table} ({column})')
+    return statements
+
+def _load_sql_table(connection, root_dir, table, batch_size, source):
+    """
+    (Re)create one table and bulk-load its CSV in a single transaction.
+
+    The drop, create, inserts, indexes and the _sources row commit together
+    (the connection is in autocommit mode, so the transaction is opened with
+    an explicit BEGIN; sqlite3 would otherwise commit the DDL on its own).
+    Other connections keep seeing the old table until the commit, and a
+    failed load is rolled back.
+
+    Parameters:
+    connection (sqlite3.Connection): Open database with isolation_level=None.
+    root_dir (str): The root directory containing the CSV files.
+    table (str): Table name.
+    batch_size (int): CSV rows parsed and inserted per executemany call.
+    source (tuple): (size, mtime_ns, sha256) of the CSV, recorded in _sources.
+    """
+    dtypes = TABLE_DTYPES[table]
+    dates = [column for column, dtype in dtypes.items() if dtype.startswith('datetime')]
+    insert = f'INSERT INTO {table} ({", ".join(dtypes)}) VALUES ({", ".join("?" * len(dtypes))})'
+    reader = pd.read_csv(os.path.join(root_dir, table + '.csv'), usecols=list(dtypes),
+                         dtype={column: dtype for column, dtype in dtypes.items() if column not in dates},
+                         parse_dates=dates, chunksize=batch_size)
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        connection.execute(f'DROP TABLE IF EXISTS {table}')
+        connection.execute(_create_table_sql(table))
+        for chunk in reader:
+            chunk = chunk[list(dtypes)]
+            for column in dates:
+                chunk[column] = pd.Series(chunk[column].to_numpy(dtype='datetime64[ns]').view(np.int64),
+                                          index=chunk.index, dtype='Int64').mask(chunk[column].isna())
+            #object columns hold plain Python ints/floats/str, with None for missing values
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            connection.executemany(insert, chunk.itertuples(index=False, name=None))
+        for statement in _create_index_sql(table):
+            connection.execute(statement)
+        connection.execute('INSERT OR REPLACE INTO _sources VALUES (?, ?, ?, ?)', (table,) + tuple(source))
+        connection.execute('COMMIT')
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+
+def connect_database(root_dir, db_path=None, batch_size=100000):
+    """
+    Open the SQLite copy of the exercise_data tables, loading any table whose CSV changed.
+
+    The database runs in WAL mode so readers are not blocked while a table is
+    reloaded. Each table is loaded with executemany inside one explicit
+    transaction and indexed afterwards (see _load_sql_table and _create_index_sql). The size, mtime and SHA-256 of
+    every loaded CSV are kept in a _sources table and checked the same way as
+    the columnar cache (see load_table).
+
+    Parameters:
+    root_dir (str): The root directory containing the CSV files.
+    db_path (str): Database file, root_dir/.cache/exercise_data.sqlite if None.
+    batch_size (int): Rows inserted per executemany call.
+
+    Returns:
+    sqlite3.Connection: The open, up to date database.
+    """
+    if db_path is None:
+        os.makedirs(os.path.join(root_dir, '.cache'), exist_ok=True)
+        db_path = os.path.join(root_dir, '.cache', 'exercise_data.sqlite')
+    #autocommit mode: single statements commit on their own, loads use explicit transactions
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute('CREATE TABLE IF NOT EXISTS _sources '
+                       '(table_name TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT)')
+    sources = {row[0]: {'size': row[1], 'mtime_ns': row[2], 'sha256': row[3]}
+               for row in connection.execute('SELECT table_name, size, mtime_ns, sha256 FROM _sources')}
+
+    for table in TABLE_DTYPES:
+        csv_path = os.path.join(root_dir, table + '.csv')
+        meta = sources.get(table)
+        mtime_ns = meta and meta['mtime_ns']
+        if _source_is_fresh(csv_path, meta):
+            if meta['mtime_ns'] != mtime_ns:
+                connection.execute('UPDATE _sources SET mtime_ns = ? WHERE table_name = ?', (meta['mtime_ns'], table))
+            continue
+        stat = os.stat(csv_path)
+        _load_sql_table(connection, root_dir, table, batch_size,
+                        (stat.st_size, stat.st_mtime_ns, _file_sha256(csv_path)))
+    return connection
+
+def _sql_fluid_statistics(connection):
+    """
+    Calculate per-fluid mean, median and standard deviation inside SQLite.
+
+    The experiment join runs once, into a temporary (fluid_id, quantities)
+    table. One GROUP BY scan of it gives every count and mean, and a second
+    scan joined to those means gives the squared deviations (two passes,
+    not sum of squares). For the medians each quantity gets one
+    (fluid_id, value) index, so the middle one or two values of a fluid are
+    read with LIMIT/OFFSET along the index instead of ranking rows. Only a
+    few rows per fluid and quantity come back. NULL values are skipped,
+    like pandas skips NaN.
+
+    Parameters:
+    connection (sqlite3.Connection): Database from connect_database.
+
+    Returns:
+    tuple: (groups, stats) as in stream_fluid_statistics.
+    """
+    connection.execute('DROP TABLE IF EXISTS temp.fluid_values')
+    connection.execute('DROP TABLE IF EXISTS temp.fluid_moments')
+    connection.execute(f"""
+        CREATE TEMP TABLE fluid_values AS
+        SELECT e.fluid_id AS fluid_id, {", ".join(f"m.{quantity} AS {quantity}" for quantity in MEASURED_QUANTITIES)}
+        FROM fluid_measurements m JOIN experiments e ON m.experiment_id = e.experiment_id
+        WHERE e.fluid_id IS NOT NULL
+    """)
+    try:
+        moments = connection.execute(f"""
+            SELECT fluid_id, {", ".join(f"COUNT({quantity}), AVG({quantity})" for quantity in MEASURED_QUANTITIES)}
+            FROM temp.fluid_values GROUP BY fluid_id ORDER BY fluid_id
+        """).fetchall()
+        connection.execute(f"""
+            CREATE TEMP TABLE fluid_moments (fluid_id INTEGER PRIMARY KEY,
+                {", ".join(f"n_{quantity}, mean_{quantity}" for quantity in MEASURED_QUANTITIES)})
+        """)
+        connection.executemany(f'INSERT INTO temp.fluid_moments VALUES ({", ".join("?" * (1 + 2 * len(MEASURED_QUANTITIES)))})',
+                               moments)
+        m2 = connection.execute(f"""
+            SELECT {", ".join(f"SUM((v.{quantity} - m.mean_{quantity}) * (v.{quantity} - m.mean_{quantity}))"
+                              for quantity in MEASURED_QUANTITIES)}
+            FROM temp.fluid_values v JOIN temp.fluid_moments m ON m.fluid_id = v.fluid_id
+            GROUP BY v.fluid_id ORDER BY v.fluid_id
+        """).fetchall()
+
+        moments = np.array(moments, dtype=np.float64).reshape(-1, 1 + 2 * len(MEASURED_QUANTITIES))
+        groups = moments[:, 0].astype(np.int64)
+        counts = moments[:, 1::2].astype(np.int64)
+        m2 = np.array(m2, dtype=np.float64).reshape(len(groups), len(MEASURED_QUANTITIES))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(m2 / (counts - 1))
+        stats = {'mean': moments[:, 2::2], 'median': np.full(counts.shape, np.nan), 'std': std}
+
+        for j, quantity in enumerate(MEASURED_QUANTITIES):
+            connection.execute(f'CREATE INDEX temp.fluid_values_{quantity} ON fluid_values (fluid_id, {quantity})')
+            query = (f'SELECT AVG(x) FROM (SELECT {quantity} AS x FROM temp.fluid_values '
+                     f'WHERE fluid_id = ? AND {quantity} IS NOT NULL ORDER BY {quantity} LIMIT ? OFFSET ?)')
+            for i, (fluid_id, n) in enumerate(zip(groups.tolist(), counts[:, j].tolist())):
+                if n:
+                    stats['median'][i, j] = connection.execute(query, (fluid_id, 2 - n % 2, (n - 1) // 2)).fetchone()[0]
+    finally:
+        connection.execute('DROP TABLE IF EXISTS temp.fluid_values')
+        connection.execute('DROP TABLE IF EXISTS temp.fluid_moments')
+    return groups, stats
+
+def calculate_fluid_statistics(root_dir, mode='groupby', chunksize=1000000, relative_error=0.005, use_cache=True,
+                               db_path=None):
     """
     Calculate statistics for fluid experiments from CSV files.
 
@@ -16,6 +645,18 @@ def calculate_fluid_statistics(root_dir):
 
     Parameters:
     root_dir (str): The root directory containing the CSV files.
+    mode (str): 'groupby' merges experiment_id/fluid_id onto the measurements and uses a pandas groupby.
+        'lookup' skips the join: experiment ids index a dense experiment_id -> fluid_id array and the
+        numeric columns are aggregated directly with NumPy (NaN values are skipped, as in 'groupby').
+        'stream' reads the measurements in chunks with bounded memory; medians are sketch estimates
+        (see stream_fluid_statistics).
+        'sql' pushes the join and the aggregation down to the SQLite copy of the tables
+        (see connect_database); only the per-fluid results are materialised.
+    chunksize (int): Rows per chunk in 'stream' mode.
+    relative_error (float): Relative error bound of the medians in 'stream' mode.
+    use_cache (bool): Load the tables through the typed columnar cache (see load_table)
+        instead of parsing the CSVs every call.
+    db_path (str): Database file in 'sql' mode (see connect_database).
 
     Returns:
     np.array: A structured NumPy array containing the calculated statistics for each fluid.
@@ -27,26 +668,568 @@ def calculate_fluid_statistics(root_dir):
         - temperature_mean, temperature_median, temperature_std (float): Statistics for temperature.
         - flow_rate_mean, flow_rate_median, flow_rate_std (float): Statistics for flow rate.
     """
-    #read data
-    fluids = pd.read_csv(root_dir + '/fluids.csv')
-    experiments = pd.read_csv(root_dir + '/experiments.csv')
-    fluid_measurements = pd.read_csv(root_dir + '/fluid_measurements.csv')
-    
-    #merge data
-    data = pd.merge(fluids, experiments, on='fluid_id')
-    data = pd.merge(data, fluid_measurements, on='experiment_id')
-    data = pd.DataFrame(data)
-    #calculate statistics
-    stats = data.groupby('fluid_id').agg({'pressure': ['mean', 'median', 'std'],
-                                         'velocity': ['mean', 'median', 'std'],
-                                         'temperature': ['mean', 'median', 'std'],
-                                         'flow_rate': ['mean', 'median', 'std']}).reset_index()
-    
-
-    print(data)
-
-    pass
-
-# Call the function and print the results
-result_array = calculate_fluid_statistics(root_dir='exercise_data') # change root_dir to where your data for this exercise is
-print(result_array)
\ No newline at end of file
+    if mode == 'sql':
+        connection = connect_database(root_dir, db_path)
+        try:
+            groups, stats = _sql_fluid_statistics(connection)
+            fluids = pd.DataFrame(connection.execute('SELECT fluid_id, fluid_name FROM fluids').fetchall(),
+                                  columns=['fluid_id', 'fluid_name'])
+        finally:
+            connection.close()
+    elif mode in ('stream', 'lookup', 'groupby'):
+        #read only the columns the statistics need
+        read = load_table if use_cache else read_typed_csv
+        fluids = read(root_dir, 'fluids', ['fluid_id', 'fluid_name'])
+        experiments = read(root_dir, 'experiments', ['experiment_id', 'fluid_id'])
+        if mode == 'stream':
+            groups, stats = stream_fluid_statistics(root_dir, chunksize, relative_error)
+        else:
+            fluid_measurements = read(root_dir, 'fluid_measurements', ['experiment_id'] + MEASURED_QUANTITIES)
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    if mode == 'lookup':
+        #dense experiment_id -> fluid_id table instead of a merge
+        fluid_ids = _lookup_fluid_ids(_experiment_fluid_lookup(experiments),
+                                      fluid_measurements['experiment_id'].to_numpy(dtype=np.int64, na_value=-1))
+        keep = fluid_ids >= 0
+
+        values = fluid_measurements[MEASURED_QUANTITIES].to_numpy(dtype=np.float64)[keep]
+        groups, mean, median, std = _grouped_statistics(fluid_ids[keep], values)
+        stats = {'mean': mean, 'median': median, 'std': std}
+    elif mode == 'groupby':
+        #attach fluid_id to each measurement; fluid names are added to the per-fluid result only
+        data = pd.merge(fluid_measurements, experiments, on='experiment_id')
+
+        #calculate statistics in a single groupby
+        grouped = data.groupby('fluid_id')[MEASURED_QUANTITIES].agg(['mean', 'median', 'std'])
+        groups = grouped.index.to_numpy(dtype=np.int64)
+        stats = {stat: grouped.xs(stat, axis=1, level=1)[MEASURED_QUANTITIES].to_numpy() for stat in ('mean', 'median', 'std')}
+
+    #fill the structured array column by column
+    result_array = np.zeros(len(groups), dtype=FLUID_STATS_DTYPE)
+    result_array['fluid_id'] = groups
+    result_array['fluid_name'] = fluids.set_index('fluid_id')['fluid_name'].astype(object).reindex(groups).fillna('').to_numpy()
+    for j, quantity in enumerate(MEASURED_QUANTITIES):
+        for stat in ('mean', 'median', 'std'):
+            result_array[f'{quantity}_{stat}'] = stats[stat][:, j]
+
+    return result_array
+
+#Control systems -- time-series analytics over measurements / signal_data
+class SensorSeries:
+    """
+    Readings of many sensors (or systems) held as flat arrays sorted by (key, timestamp).
+
+    Timestamps are converted once to int64 nanoseconds. Because each key's
+    readings are contiguous and in time order, resampling, rolling and
+    windowed statistics are computed for every key at once with cumulative
+    sums, np.add.reduceat and searchsorted, never with a Python loop per key.
+    """
+
+    def __init__(self, keys, t_ns, values, key_name='sensor_id'):
+        """
+        Parameters:
+        keys (np.ndarray): Integer sensor (or system) id of each reading.
+        t_ns (np.ndarray): Timestamps as int64 nanoseconds since the epoch.
+        values (np.ndarray): Reading values.
+        key_name (str): Name of the key column in the outputs.
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        t_ns = np.asarray(t_ns, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        order = np.lexsort((t_ns, keys))
+        self.keys = keys[order]
+        self.t_ns = t_ns[order]
+        self.values = values[order]
+        self.key_name = key_name
+        self.groups, self.starts, self.counts = np.unique(self.keys, return_index=True, return_counts=True)
+
+    @classmethod
+    def from_table(cls, root_dir, table='measurements', use_cache=True):
+        """
+        Load a sensor reading table (measurements or signal_data).
+
+        Parameters:
+        root_dir (str): The root directory containing the CSV files.
+        table (str): 'measurements' or 'signal_data'.
+        use_cache (bool): Load through the typed columnar cache (see load_table).
+
+        Returns:
+        SensorSeries: Readings keyed by sensor_id; rows with a missing sensor or timestamp are dropped.
+        """
+        read = load_table if use_cache else read_typed_csv
+        data = read(root_dir, table, ['sensor_id', 'timestamp', 'value']).dropna(subset=['sensor_id', 'timestamp'])
+        return cls(data['sensor_id'].to_numpy(dtype=np.int64),
+                   data['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64),
+                   data['value'].to_numpy(dtype=np.float64))
+
+    @classmethod
+    def from_sql(cls, root_dir, table='measurements', sensor_ids=None, system_ids=None, start=None, end=None,
+                 db_path=None):
+        """
+        Load filtered sensor readings from the SQLite copy of the tables.
+
+        The filters run in SQL on the (sensor_id, timestamp) index and the rows
+        arrive already sorted, so only the selected readings are materialised.
+
+        Parameters:
+        root_dir (str): The root directory containing the CSV files.
+        table (str): 'measurements' or 'signal_data'.
+        sensor_ids, system_ids, start, end: Filters, see _sensor_filter_sql.
+        db_path (str): Database file (see connect_database).
+
+        Returns:
+        SensorSeries: The selected readings keyed by sensor_id.
+        """
+        where, params = _sensor_filter_sql(sensor_ids, system_ids, start, end)
+        connection = connect_database(root_dir, db_path)
+        try:
+            rows = connection.execute(f'SELECT r.sensor_id, r.timestamp, r.value FROM {table} r {where} '
+                                      'ORDER BY r.sensor_id, r.timestamp', params).fetchall()
+        finally:
+            connection.close()
+        sensor, t_ns, value = zip(*rows) if rows else ((), (), ())
+        return cls(sensor, t_ns, value)
+
+    def by_system(self, sensors):
+        """
+        Re-key the readings by the system each sensor belongs to.
+
+        Parameters:
+        sensors (pd.DataFrame): Table with sensor_id and system_id columns.
+
+        Returns:
+        SensorSeries: Readings keyed by system_id (sensors without a system are dropped).
+        """
+        sensors = sensors.dropna(subset=['sensor_id', 'system_id'])
+        sensor_ids = sensors['sensor_id'].to_numpy(dtype=np.int64)
+        sensor_to_system = np.full(max(sensor_ids.max(initial=-1), self.keys.max(initial=-1)) + 1, -1, dtype=np.int64)
+        sensor_to_system[sensor_ids] = sensors['system_id'].to_numpy(dtype=np.int64)
+        systems = sensor_to_system[self.keys]
+        keep = systems >= 0
+        return SensorSeries(systems[keep], self.t_ns[keep], self.values[keep], key_name='system_id')
+
+    def _group_index(self):
+        # position of each reading's key in self.groups
+        return np.repeat(np.arange(len(self.groups)), self.counts)
+
+    def _prefix_sums(self, values=None):
+        # cumulative (valid count, sum) with a leading zero; NaN readings count as absent,
+        # so one missing value cannot leak into later windows or other keys
+        values = self.values if values is None else values
+        valid = ~np.isnan(values)
+        return (np.concatenate(([0], np.cumsum(valid))),
+                np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0)))))
+
+    def _run_statistics(self, starts):
+        """
+        Calculate statistics over contiguous runs of readings, skipping NaN values.
+
+        Parameters:
+        starts (np.ndarray): Sorted start index of each run; a run ends where the next begins.
+
+        Returns:
+        dict: count (valid readings), mean, min, max, std and last (last valid value) per run.
+        """
+        if len(starts) == 0:
+            return {'count': np.zeros(0, dtype=np.int64), 'mean': np.zeros(0), 'min': np.zeros(0),
+                    'max': np.zeros(0), 'std': np.zeros(0), 'last': np.zeros(0)}
+        rows = np.diff(np.append(starts, len(self.values)))
+        valid = ~np.isnan(self.values)
+        count = np.add.reduceat(valid.astype(np.int64), starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.add.reduceat(np.where(valid, self.values, 0.0), starts) / count
+            squared_dev = np.where(valid, (self.values - np.repeat(mean, rows)) ** 2, 0.0)
+            std = np.where(count > 1, np.sqrt(np.add.reduceat(squared_dev, starts) / (count - 1)), np.nan)
+        last = np.maximum.reduceat(np.where(valid, np.arange(len(self.values)), -1), starts)
+        return {
+            'count': count,
+            'mean': mean,
+            'min': np.fmin.reduceat(self.values, starts),
+            'max': np.fmax.reduceat(self.values, starts),
+            'std': std,
+            'last': np.where(last >= starts, self.values[np.maximum(last, 0)], np.nan),
+        }
+
+    def resample(self, freq):
+        """
+        Aggregate each key's readings into fixed time buckets.
+
+        Parameters:
+        freq (str or pd.Timedelta): Bucket width, e.g. '1h' or '1D'.
+
+        Returns:
+        pd.DataFrame: One row per non-empty (key, bucket) with count, mean, min, max, std and last
+            (NaN readings are skipped, so count is the number of valid readings).
+        """
+        width = pd.Timedelta(freq).value
+        bucket = self.t_ns // width * width
+        #a new run starts wherever the key or the bucket changes
+        change = np.ones(len(bucket), dtype=bool)
+        change[1:] = (self.keys[1:] != self.keys[:-1]) | (bucket[1:] != bucket[:-1])
+        starts = np.flatnonzero(change)
+        if len(starts) == 0:
+            return pd.DataFrame(columns=[self.key_name, 'timestamp', 'count', 'mean', 'min', 'max', 'std', 'last'])
+        stats = self._run_statistics(starts)
+        return pd.DataFrame({
+            self.key_name: self.keys[starts],
+            'timestamp': bucket[starts].view('datetime64[ns]'),
+            **stats,
+        })
+
+    def window_starts(self, window):
+        """
+        Find where the trailing window of every reading starts, never crossing into another key.
+
+        Parameters:
+        window (int, str or pd.Timedelta): Number of readings, or a time span such as '30min'
+            (readings with t > t_i - window are included).
+
+        Returns:
+        np.ndarray: Index of the first reading in each reading's window.
+        """
+        group_start = np.repeat(self.starts, self.counts)
+        if isinstance(window, (int, np.integer)):
+            return np.maximum(np.arange(len(self.values)) - window + 1, group_start)
+
+        return self.locate(self.keys, self.t_ns - pd.Timedelta(window).value, side='right')
+
+    def locate(self, keys, t_ns, side='left'):
+        """
+        Find, for many (key, time) queries at once, the first reading of that key at or after the time.
+
+        Parameters:
+        keys (np.ndarray): Key of each query.
+        t_ns (np.ndarray): Time of each query as int64 nanoseconds.
+        side (str): 'left' for the first reading with t >= t_ns, 'right' for the first with t > t_ns.
+
+        Returns:
+        np.ndarray: Index into the sorted arrays; readings of the key before the time lie in
+            [start of key, index). Keys without readings give an empty range.
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        t_ns = np.asarray(t_ns, dtype=np.int64)
+        #rank all timestamps so (key, time) packs into one monotone int64 search key
+        unique_t = np.unique(np.concatenate((self.t_ns, t_ns)))
+        stride = len(unique_t) + 1
+        packed = self._group_index().astype(np.int64) * stride + np.searchsorted(unique_t, self.t_ns)
+        group = np.searchsorted(self.groups, keys)
+        present = self.groups[np.minimum(group, len(self.groups) - 1)] == keys if len(self.groups) else np.zeros(len(keys), dtype=bool)
+        #unknown keys all map to the start of the next group so their ranges come out empty
+        query = group.astype(np.int64) * stride + np.where(present, np.searchsorted(unique_t, t_ns), 0)
+        return np.searchsorted(packed, query, side=side)
+
+    def rolling(self, window, stat='mean'):
+        """
+        Calculate a trailing rolling statistic for every reading of every key.
+
+        Parameters:
+        window (int, str or pd.Timedelta): Number of readings or time span, see window_starts.
+        stat (str): 'mean', 'sum', 'count' or 'std'; NaN readings are skipped (count is the number
+            of valid readings, and a window without any gives NaN).
+
+        Returns:
+        np.ndarray: The statistic for each reading, aligned with self.values.
+        """
+        lo = self.window_starts(window)
+        hi = np.arange(1, len(self.values) + 1)
+        cum_count, cum = self._prefix_sums()
+        count = cum_count[hi] - cum_count[lo]
+        total = np.where(count > 0, cum[hi] - cum[lo], np.nan)
+        if stat == 'sum':
+            return total
+        if stat == 'count':
+            return count
+        if stat == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return total / count
+        if stat == 'std':
+            #centre on the key's mean first so the cumulative squares stay well conditioned
+            key_mean = self._run_statistics(self.starts)['mean']
+            centred = self.values - np.repeat(key_mean, self.counts)
+            _, cum = self._prefix_sums(centred)
+            _, cum_sq = self._prefix_sums(centred ** 2)
+            sums = cum[hi] - cum[lo]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                variance = np.maximum(cum_sq[hi] - cum_sq[lo] - sums ** 2 / count, 0) / (count - 1)
+            return np.where(count > 1, np.sqrt(variance), np.nan)
+        raise ValueError(f"Unknown rolling statistic: {stat}")
+
+    def summary(self):
+        """
+        Calculate whole-series statistics per key.
+
+        Returns:
+        pd.DataFrame: One row per key with count (valid readings), first/last timestamp, mean, min,
+            max and std, NaN readings skipped.
+        """
+        stats = self._run_statistics(self.starts)
+        return pd.DataFrame({
+            self.key_name: self.groups,
+            'count': stats['count'],
+            'first': self.t_ns[self.starts].view('datetime64[ns]'),
+            'last': self.t_ns[self.starts + self.counts - 1].view('datetime64[ns]'),
+            'mean': stats['mean'],
+            'min': stats['min'],
+            'max': stats['max'],
+            'std': stats['std'],
+        })
+
+
+def control_action_impact(root_dir, before='7D', after='7D', by='sensor', table='measurements', use_cache=True):
+    """
+    Attach the readings just before and just after every control action and measure the change.
+
+    Each action is matched to the sensors on its system_id (or to the system as a whole), and its
+    pre-event window [t - before, t) and post-event window [t, t + after) are located with sorted
+    searches instead of a cross join, so the cost is O(n log n) in readings plus actions.
+
+    Parameters:
+    root_dir (str): The root directory containing the CSV files.
+    before (str or pd.Timedelta): Length of the pre-event window.
+    after (str or pd.Timedelta): Length of the post-event window.
+    by (str): 'sensor' for one row per (action, sensor on the system), 'system' for one row per action.
+    table (str): Reading table, 'measurements' or 'signal_data'.
+    use_cache (bool): Load through the typed columnar cache (see load_table).
+
+    Returns:
+    pd.DataFrame: The action columns plus pre/post window bounds (indices into the sorted
+        SensorSeries), counts and means of the valid (non-NaN) readings, delta (post_mean - pre_mean),
+        and the nearest valid readings last_before and first_after.
+    """
+    read = load_table if use_cache else read_typed_csv
+    actions = read(root_dir, 'control_actions').dropna(subset=['system_id', 'timestamp'])
+    sensors = read(root_dir, 'sensors', ['sensor_id', 'system_id']).dropna()
+    series = SensorSeries.from_table(root_dir, table, use_cache)
+
+    if by == 'sensor':
+        events = actions.merge(sensors, on='system_id', how='inner')
+    elif by == 'system':
+        events = actions.copy()
+        series = series.by_system(sensors)
+    else:
+        raise ValueError(f"Unknown grouping: {by}")
+    events = events.reset_index(drop=True)
+
+    keys = events[series.key_name].to_numpy(dtype=np.int64)
+    t_ns = events['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    pre_start = series.locate(keys, t_ns - pd.Timedelta(before).value)
+    event_pos = series.locate(keys, t_ns)
+    post_end = series.locate(keys, t_ns + pd.Timedelta(after).value)
+
+    #NaN readings are masked out of the sums and counts, so they cannot leak into other events
+    cum_count, cum = series._prefix_sums()
+    pre_count = cum_count[event_pos] - cum_count[pre_start]
+    post_count = cum_count[post_end] - cum_count[event_pos]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pre_mean = (cum[event_pos] - cum[pre_start]) / pre_count
+        post_mean = (cum[post_end] - cum[event_pos]) / post_count
+    #as-of neighbours: nearest valid reading of the same key on either side, however far away
+    #(a sentinel reading with key -1 keeps the clipped lookups valid for an empty series)
+    n = len(series.keys)
+    neighbour_keys = np.append(series.keys, -1)
+    neighbour_values = np.append(series.values, np.nan)
+    valid_index = np.where(np.isnan(series.values), -1, np.arange(n))
+    last_valid = np.append(np.maximum.accumulate(valid_index), -1)
+    next_valid = np.append(np.minimum.accumulate(np.where(valid_index < 0, n, valid_index)[::-1])[::-1], n)
+    previous = np.where(event_pos > 0, last_valid[event_pos - 1], -1)
+    previous = np.where(previous >= 0, previous, n)
+    following = next_valid[event_pos]
+    has_previous = neighbour_keys[previous] == keys
+    has_next = neighbour_keys[following] == keys
+
+    events['pre_start'] = pre_start
+    events['event_index'] = event_pos
+    events['post_end'] = post_end
+    events['pre_count'] = pre_count
+    events['pre_mean'] = pre_mean
+    events['post_count'] = post_count
+    events['post_mean'] = post_mean
+    events['delta'] = post_mean - pre_mean
+    events['last_before'] = np.where(has_previous, neighbour_values[previous], np.nan)
+    events['first_after'] = np.where(has_next, neighbour_values[following], np.nan)
+    return events
+
+
+def spectral_features(series, min_samples=4, harmonic_limits=(0.2, 0.05), min_concentration=0.5):
+    """
+    Estimate dominant frequency, amplitude and waveform type for every key of a SensorSeries at once.
+
+    Each key's irregular readings are linearly interpolated onto a uniform grid with as many points
+    as it has readings, mean-removed, zero-padded into one 2-D array and transformed with a single
+    batched np.fft.rfft. The waveform is classified from the third harmonic relative to the
+    fundamental: about 1/3 for a square wave, 1/9 for a triangle wave, near zero for a sine.
+
+    Parameters:
+    series (SensorSeries): Readings sorted by (key, timestamp).
+    min_samples (int): Keys with fewer readings (or zero time span) are skipped.
+    harmonic_limits (tuple): Third-harmonic ratios above which a signal is 'Square' / 'Triangle'.
+    min_concentration (float): Share of the AC power, above what white noise would put there, that
+        must sit at the fundamental and its odd harmonics, otherwise the signal is 'Other'.
+
+    Returns:
+    pd.DataFrame: One row per analysed key with frequency (Hz), amplitude and signal_type.
+    """
+    t0 = series.t_ns[series.starts] if len(series.values) else np.zeros(0, dtype=np.int64)
+    span = series.t_ns[series.starts + series.counts - 1] - t0 if len(series.values) else t0
+    usable = (series.counts >= min_samples) & (span > 0)
+    groups, starts, counts, t0, span = series.groups[usable], series.starts[usable], series.counts[usable], t0[usable], span[usable]
+    columns = [series.key_name, 'frequency', 'amplitude', 'signal_type']
+    if len(groups) == 0:
+        return pd.DataFrame(columns=columns)
+
+    #uniform grid: row g gets counts[g] points spread evenly over its own time span
+    row = np.repeat(np.arange(len(groups)), counts)
+    column = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    step = span / (counts - 1)
+    t_grid = t0[row] + np.round(column * step[row]).astype(np.int64)
+
+    #linear interpolation between the neighbouring readings of the same key
+    right = np.clip(series.locate(groups[row], t_grid, side='right'), starts[row] + 1, starts[row] + counts[row] - 1)
+    left = right - 1
+    gap = (series.t_ns[right] - series.t_ns[left]).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = np.where(gap > 0, (t_grid - series.t_ns[left]) / gap, 0.0)
+    resampled = series.values[left] + fraction * (series.values[right] - series.values[left])
+    resampled -= np.repeat(np.add.reduceat(resampled, np.cumsum(counts) - counts) / counts, counts)
+
+    padded = np.zeros((len(groups), counts.max()))
+    padded[row, column] = resampled
+    magnitude = np.abs(np.fft.rfft(padded, axis=1))
+    magnitude[:, 0] = 0.0
+    n_padded = padded.shape[1]
+
+    peak = np.argmax(magnitude, axis=1)
+    rows = np.arange(len(groups))
+    #zero padding spreads each line over about n_padded / counts bins
+    width = np.ceil(n_padded / counts).astype(np.int64)[:, None]
+    bins = np.arange(magnitude.shape[1])[None, :]
+
+    def band_peak(centre):
+        near = np.abs(bins - centre[:, None]) <= width
+        return np.where(near, magnitude, 0.0).max(axis=1), near
+
+    fundamental, near_fundamental = band_peak(peak)
+    third, near_third = band_peak(3 * peak)
+    _, near_fifth = band_peak(5 * peak)
+    power = magnitude ** 2
+    near = (near_fundamental | near_third | near_fifth) & (bins > 0)
+    #share of the bins those bands cover, i.e. the power share expected from white noise
+    covered = near.sum(axis=1) / (magnitude.shape[1] - 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = third / fundamental
+        share = np.where(near, power, 0.0).sum(axis=1) / power.sum(axis=1)
+        concentration = (share - covered) / (1.0 - covered)
+
+    square_limit, triangle_limit = harmonic_limits
+    signal_type = np.select([~(concentration >= min_concentration), ratio > square_limit, ratio > triangle_limit],
+                            ['Other', 'Square', 'Triangle'], default='Sine')
+    return pd.DataFrame({
+        series.key_name: groups,
+        'frequency': peak / (n_padded * step * 1e-9),
+        'amplitude': 2.0 * magnitude[rows, peak] / counts,
+        'signal_type': signal_type,
+    })
+
+
+def characterise_signals(root_dir, output_file=None, use_cache=True, **kwargs):
+    """
+    Derive the signal_characteristics table from the raw signal_data samples.
+
+    Parameters:
+    root_dir (str): The root directory containing the CSV files.
+    output_file (str): Optional CSV path to write the table to.
+    use_cache (bool): Load through the typed columnar cache (see load_table).
+    **kwargs: Passed on to spectral_features.
+
+    Returns:
+    pd.DataFrame: characteristic_id, sensor_id, frequency, amplitude and signal_type per sensor.
+    """
+    features = spectral_features(SensorSeries.from_table(root_dir, 'signal_data', use_cache), **kwargs)
+    features.insert(0, 'characteristic_id', np.arange(1, len(features) + 1))
+    if output_file is not None:
+        features.to_csv(output_file, index=False)
+    return features
+
+
+def _sensor_filter_sql(sensor_ids=None, system_ids=None, start=None, end=None):
+    """
+    Build the WHERE clause for reading-table queries (table alias r).
+
+    Parameters:
+    sensor_ids (list): Keep only these sensors, all if None.
+    system_ids (list): Keep only sensors on these systems (through the sensors table), all if None.
+    start, end (str or pd.Timestamp): Keep readings with start <= timestamp < end, unbounded if None.
+
+    Returns:
+    tuple: (where clause, parameters) with the values bound as '?' placeholders.
+    """
+    conditions = ['r.sensor_id IS NOT NULL', 'r.timestamp IS NOT NULL']
+    params = []
+    if sensor_ids is not None:
+        sensor_ids = [int(sensor_id) for sensor_id in sensor_ids]
+        conditions.append(f'r.sensor_id IN ({", ".join("?" * len(sensor_ids))})')
+        params += sensor_ids
+    if system_ids is not None:
+        system_ids = [int(system_id) for system_id in system_ids]
+        conditions.append(f'r.sensor_id IN (SELECT sensor_id FROM sensors WHERE system_id IN '
+                          f'({", ".join("?" * len(system_ids))}))')
+        params += system_ids
+    if start is not None:
+        conditions.append('r.timestamp >= ?')
+        params.append(pd.Timestamp(start).value)
+    if end is not None:
+        conditions.append('r.timestamp < ?')
+        params.append(pd.Timestamp(end).value)
+    return 'WHERE ' + ' AND '.join(conditions), params
+
+
+def sensor_summary_sql(root_dir, table='measurements', freq=None, by='sensor', sensor_ids=None, system_ids=None,
+                       start=None, end=None, db_path=None):
+    """
+    Aggregate sensor readings inside SQLite, optionally per fixed time bucket.
+
+    Parameters:
+    root_dir (str): The root directory containing the CSV files.
+    table (str): 'measurements' or 'signal_data'.
+    freq (str or pd.Timedelta): Bucket width, e.g. '1D'; one row per key if None.
+    by (str): 'sensor' or 'system' (readings joined to their sensor's system).
+    sensor_ids, system_ids, start, end: Filters, see _sensor_filter_sql.
+    db_path (str): Database file (see connect_database).
+
+    Returns:
+    pd.DataFrame: count (non-NULL readings), mean, min and max per key (and bucket), like
+        SensorSeries.resample / summary.
+    """
+    if by not in ('sensor', 'system'):
+        raise ValueError(f"Unknown grouping: {by}")
+    key = 'r.sensor_id' if by == 'sensor' else 's.system_id'
+    join = '' if by == 'sensor' else 'JOIN sensors s ON s.sensor_id = r.sensor_id'
+    where, params = _sensor_filter_sql(sensor_ids, system_ids, start, end)
+    if by == 'system':
+        where += ' AND s.system_id IS NOT NULL'
+    select = [f'{key} AS {by}_id']
+    group = [key]
+    if freq is not None:
+        #timestamps are integer nanoseconds, so bucketing is integer division
+        width = pd.Timedelta(freq).value
+        select.append(f'(r.timestamp / {width}) * {width} AS bucket')
+        group.append('bucket')
+
+    query = (f'SELECT {", ".join(select)}, COUNT(r.value), AVG(r.value), MIN(r.value), MAX(r.value) '
+             f'FROM {table} r {join} {where} GROUP BY {", ".join(group)} ORDER BY {", ".join(group)}')
+    connection = connect_database(root_dir, db_path)
+    try:
+        summary = pd.DataFrame(connection.execute(query, params).fetchall(),
+                               columns=[f'{by}_id'] + (['timestamp'] if freq is not None else []) + ['count', 'mean', 'min', 'max'])
+    finally:
+        connection.close()
+    if freq is not None:
+        summary['timestamp'] = summary['timestamp'].to_numpy(dtype=np.int64).view('datetime64[ns]')
+    return summary
+
+if __name__ == "__main__":
+    # Call the function and print the results
+    result_array = calculate_fluid_statistics(root_dir='exercise_data') # change root_dir to where your data for this exercise is
+    print(result_array)
@@ -4,7 +4,23 @@
 #Project 1 -- Book Analysis -- Template 0
 
 import csv
+import gc
+import gzip
+import heapq
+import io
 import json
+import os
+import sys
+import time
+from collections.abc import Mapping, MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+import numpy as np
+
+# binary report layout: magic, then blocks of (uint32 row count, one column per field);
+# string columns are int32 byte lengths followed by the utf-8 bytes
+REPORT_MAGIC = b"BOOKCOL1"
+REPORT_FIELDS = ('title', 'author', 'year', 'genre', 'price')
 
 def load_book_data(filename):
     """
@@ -31,6 +47,107 @@ def load_book_data(filename):
 
 '''--------------------------------------------------------------------------------------------------------------------'''
 
+def _book_columns(rows, header):
+    # parsed csv rows -> typed columns: str lists for text, int64/float64 arrays for year/price
+    positions = [header.index(field) for field in REPORT_FIELDS]
+    columns = {field: [row[i] for row in rows] for field, i in zip(REPORT_FIELDS, positions)}
+    columns['year'] = np.fromiter(map(int, columns['year']), dtype=np.int64, count=len(rows))
+    columns['price'] = np.fromiter(map(float, columns['price']), dtype=np.float64, count=len(rows))
+    return columns
+
+def _parse_book_chunk(task):
+    """
+    Parse the rows between two byte offsets of a CSV file into typed columns (runs in a worker).
+    Args:
+        task (tuple): (filename, start, end, header)
+    Returns:
+        dict: Columns for the rows in the chunk
+    """
+    filename, start, end, header = task
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode('utf-8')
+    # the cyclic GC would rescan the millions of new row objects over and over; none of them form cycles
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _book_columns([row for row in csv.reader(io.StringIO(text, newline='')) if row], header)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def _concat_book_columns(chunks):
+    return {field: (np.concatenate([chunk[field] for chunk in chunks]) if field in ('year', 'price')
+                    else [value for chunk in chunks for value in chunk[field]])
+            for field in REPORT_FIELDS}
+
+def load_book_columns(filename, workers=None, chunk_bytes=1 << 26):
+    """
+    Read book data from a CSV file into typed columns, parsing chunks in parallel.
+    The file is split at line boundaries into chunks of about chunk_bytes,
+    each parsed in a process pool, and the column pieces are concatenated.
+    Fields must not contain embedded newlines. Parse throughput is printed.
+    Args:
+        filename (str): Name of the CSV file
+        workers (int): Number of worker processes (None uses all cores, 1 parses in-process)
+        chunk_bytes (int): Approximate size of each chunk in bytes
+    Returns:
+        dict: title, author, genre (lists of str), year (int64 array) and price (float64 array)
+    """
+    try:
+        started = time.perf_counter()
+        size = os.path.getsize(filename)
+        with open(filename, 'rb') as file:
+            header = next(csv.reader([file.readline().decode('utf-8')]))
+            # each boundary is moved forward to the start of the next line
+            boundaries = [file.tell()]
+            while boundaries[-1] < size:
+                file.seek(min(boundaries[-1] + chunk_bytes, size))
+                file.readline()
+                boundaries.append(min(file.tell(), size))
+        tasks = [(filename, start, end, header) for start, end in zip(boundaries, boundaries[1:])]
+
+        if workers == 1 or len(tasks) <= 1:
+            chunks = list(map(_parse_book_chunk, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+                chunks = list(pool.map(_parse_book_chunk, tasks))
+        columns = _concat_book_columns(chunks) if chunks else _book_columns([], header)
+
+        elapsed = time.perf_counter() - started
+        n_rows = len(columns['title'])
+        print(f"Parsed {n_rows} rows in {elapsed:.3f} s ({n_rows / max(elapsed, 1e-9):,.0f} rows/s) \n")
+        return columns
+
+    except FileNotFoundError:
+        print(f"\n The file {filename} could not be found. Please check the file input and try again.")
+        return {}
+    except Exception as e:
+        print(f"Error reading the file {filename}: {e}")
+        return {}
+
+'''--------------------------------------------------------------------------------------------------------------------'''
+
+def iter_book_batches(filename, batch_size=65536):
+    """
+    Stream a book CSV as fixed-size batches of typed columns.
+    Args:
+        filename (str): Name of the CSV file
+        batch_size (int): Number of rows per batch (the last batch may be shorter)
+    Yields:
+        dict: Columns for one batch, as returned by load_book_columns
+    """
+    with open(filename, 'r', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        while True:
+            rows = [row for row in islice(reader, batch_size) if row]
+            if not rows:
+                break
+            yield _book_columns(rows, header)
+
+'''--------------------------------------------------------------------------------------------------------------------'''
+
 def calculate_discount_price(books, discount_rate):
     """
     Calculate and add discounted price for each book.
@@ -63,7 +180,10 @@ def find_unique_genres(books):
         set: Set of unique genres
     """
     try:
-        unique_genres = {book['genre'] for book in books if 'genre' in book}
+        if isinstance(books, BookTable):
+            unique_genres = {books.genre_categories[code] for code in np.unique(books.genre_codes).tolist()}
+        else:
+            unique_genres = {book['genre'] for book in books if 'genre' in book}
         print("Unique genres found successfully! \n")
         return unique_genres
      
@@ -127,6 +247,32 @@ def sort_books(books, sort_by, reverse=False):
     
 
 
+"""--------------------------------------------------------------------------------------------------------------------"""
+
+def top_k_books(books, sort_by, k, reverse=True):
+    """
+    Return the k books with the highest (or lowest) value of a numeric property.
+    Uses a heap of size k, so the list is never fully sorted and each value is parsed once.
+    Args:
+        books (list of dict): List of book dictionaries
+        sort_by (str): Property to rank by
+        k (int): Number of books to return
+        reverse (bool): Return the highest values if True, else the lowest
+    Returns:
+        list of dict: The top k book dictionaries, in sorted order
+    """
+    try:
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        keyed = ((float(book[sort_by]), book) for book in books)
+        return [book for value, book in select(k, keyed, key=lambda item: item[0])]
+
+    except KeyError:
+        print(f"Cannot sort by {sort_by}. Invalid key.")
+        return []
+    except ValueError:
+        print(f"Cannot convert field {sort_by} to numeric value for sorting.")
+        return []
+
 """--------------------------------------------------------------------------------------------------------------------"""
 
 def find_most_prolific_author(books):
@@ -143,14 +289,17 @@ def find_most_prolific_author(books):
             print("The book list is empty. No prolific author found.")
             return None
         
-        for book in books:
-            author = book['author']
-            
-            if author in author_count:
-                author_count[author] += 1
-            
-            else:
-                author_count[author] = 1
+        if isinstance(books, BookTable):
+            author_count = books.author_counts()
+        else:
+            for book in books:
+                author = book['author']
+                
+                if author in author_count:
+                    author_count[author] += 1
+                
+                else:
+                    author_count[author] = 1
 
         if not author_count:
             print("No valid authors found in the dataset.")
@@ -176,16 +325,22 @@ def calculate_average_price_by_genre(books):
     genre_prices = {}
     genre_counts = {} 
     try:
-        for book in books:
-            genre = book['genre']
-            price = float(book['price'])
-    #loop through the books and calc avg price for each genre
-            if genre in genre_counts:
-                genre_counts[genre] += 1
-                genre_prices[genre] += price
-            else: 
-                genre_counts[genre] = 1
-                genre_prices[genre] = price
+        if isinstance(books, BookTable):
+            # integer-keyed group sums over the genre codes
+            for genre, (total, count) in books.genre_price_stats().items():
+                genre_prices[genre] = total
+                genre_counts[genre] = count
+        else:
+            for book in books:
+                genre = book['genre']
+                price = float(book['price'])
+        #loop through the books and calc avg price for each genre
+                if genre in genre_counts:
+                    genre_counts[genre] += 1
+                    genre_prices[genre] += price
+                else: 
+                    genre_counts[genre] = 1
+                    genre_prices[genre] = price
 
         average_prices = {genre: format(float(genre_prices[genre] / genre_counts[genre]), '.2f') for genre in genre_prices}
         print("Average prices by genre have been calculated successfully! \n")
@@ -215,6 +370,103 @@ def generate_book_report(books, output_filename):
     except Exception as e:
         print(f"Error generating book report: {e}")
 
+"""--------------------------------------------------------------------------------------------------------------------"""
+
+def _encode_report_block(block, fmt, fieldnames):
+    # one block of rows -> bytes in the requested format
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction='ignore').writerows(block)
+        return buffer.getvalue().encode('utf-8')
+    if fmt == 'jsonl':
+        return ('\n'.join(map(json.dumps, map(dict, block))) + '\n').encode('utf-8')
+
+    parts = [np.array([len(block)], dtype='<u4').tobytes()]
+    for field in REPORT_FIELDS:
+        if field == 'year':
+            parts.append(np.array([int(book[field]) for book in block], dtype='<i8').tobytes())
+        elif field == 'price':
+            parts.append(np.array([float(book[field]) for book in block], dtype='<f8').tobytes())
+        else:
+            encoded = [str(book[field]).encode('utf-8') for book in block]
+            parts.append(np.array([len(value) for value in encoded], dtype='<i4').tobytes())
+            parts.append(b''.join(encoded))
+    return b''.join(parts)
+
+def write_book_report(books, output_filename, fmt='csv', batch_size=65536):
+    """
+    Stream book records to a report file in large buffered writes.
+    Rows are pulled from the iterator one batch at a time, encoded into a
+    single bytes chunk and written, so the full report is never held in
+    memory. A filename ending in .gz is gzip-compressed on the fly.
+    Args:
+        books (iterable of dict): Book dictionaries, e.g. a generator
+        output_filename (str): Name of the output file
+        fmt (str): 'csv', 'jsonl' or 'binary' (columnar blocks, see read_binary_book_report)
+        batch_size (int): Number of rows encoded per write
+    Returns:
+        int: Number of rows written
+    """
+    if fmt not in ('csv', 'jsonl', 'binary'):
+        raise ValueError(f"Unknown report format: {fmt}")
+    rows_written = 0
+    try:
+        books = iter(books)
+        first = next(books, None)
+        opener = gzip.open if output_filename.endswith('.gz') else open
+        with opener(output_filename, 'wb') as file:
+            if fmt == 'binary':
+                file.write(REPORT_MAGIC)
+            if first is None:
+                return 0
+            fieldnames = list(first.keys())
+            if fmt == 'csv':
+                file.write((','.join(fieldnames) + '\r\n').encode('utf-8'))
+            books = chain([first], books)
+            while True:
+                block = list(islice(books, batch_size))
+                if not block:
+                    break
+                file.write(_encode_report_block(block, fmt, fieldnames))
+                rows_written += len(block)
+        print("Book report has been generated successfully! \n")
+
+    except FileNotFoundError:
+        print(f"Error writing to file {output_filename}.")
+    except Exception as e:
+        print(f"Error generating book report: {e}")
+    return rows_written
+
+"""--------------------------------------------------------------------------------------------------------------------"""
+
+def read_binary_book_report(filename):
+    """
+    Read a binary report written by write_book_report one block at a time.
+    Args:
+        filename (str): Name of the binary report (.gz is decompressed)
+    Yields:
+        dict: Columns of one block (lists of str for text fields, arrays for year and price)
+    """
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'rb') as file:
+        if file.read(len(REPORT_MAGIC)) != REPORT_MAGIC:
+            raise ValueError(f"{filename} is not a binary book report.")
+        while True:
+            header = file.read(4)
+            if not header:
+                break
+            n_rows = int(np.frombuffer(header, dtype='<u4')[0])
+            block = {}
+            for field in REPORT_FIELDS:
+                if field in ('year', 'price'):
+                    dtype = '<i8' if field == 'year' else '<f8'
+                    block[field] = np.frombuffer(file.read(8 * n_rows), dtype=dtype)
+                else:
+                    lengths = np.frombuffer(file.read(4 * n_rows), dtype='<i4')
+                    data = file.read(int(lengths.sum()))
+                    ends = np.cumsum(lengths).tolist()
+                    block[field] = [data[start:end].decode('utf-8') for start, end in zip([0] + ends[:-1], ends)]
+            yield block
 
 """--------------------------------------------------------------------------------------------------------------------"""
 
@@ -228,15 +480,17 @@ def update_book_properties(books, updates):
         list of dict: Updated list of book dictionaries
     """
     for book in books:
-        
         if 'title' not in book:
             raise ValueError(f"Book {book} does not contain ana 'title' key.")
-        
-        book_title = book.get('title')
 
-        for title in updates:
-            if title not in [book['title'] for book in books]:
-                raise ValueError(f"Title '{title}' not found in the books database.")
+    # validate every update title in one set operation before touching any book
+    missing = set(updates) - {book['title'] for book in books}
+    for title in updates:
+        if title in missing:
+            raise ValueError(f"Title '{title}' not found in the books database.")
+
+    for book in books:
+        book_title = book.get('title')
         
         if book_title in updates:
             update_info = updates[book_title]
@@ -251,6 +505,36 @@ def update_book_properties(books, updates):
     
 """--------------------------------------------------------------------------------------------------------------------"""
 
+def bulk_update_book_properties(books, updates):
+    """
+    Apply a large batch of updates in O(books + updates) without aborting on missing titles.
+    Args:
+        books (list of dict): List of book dictionaries
+        updates (dict): Dictionary of updates for books, keyed by title
+    Returns:
+        tuple: (updated list of book dictionaries, list of titles that were not found)
+    """
+    title_index = {}
+    for row, book in enumerate(books):
+        if 'title' not in book:
+            raise ValueError(f"Book {book} does not contain ana 'title' key.")
+        title_index.setdefault(book['title'], []).append(row)
+
+    # validate the whole batch before any book is modified
+    for title, update_info in updates.items():
+        if not isinstance(update_info, dict):
+            raise ValueError(f"Updates for book with Title {title} must be a dictionary. Found: {type(update_info)}")
+
+    missing = [title for title in updates if title not in title_index]
+    for title, update_info in updates.items():
+        for row in title_index.get(title, ()):
+            books[row].update(update_info)
+
+    print(f"{len(updates) - len(missing)} titles updated, {len(missing)} not found. \n")
+    return books, missing
+
+"""--------------------------------------------------------------------------------------------------------------------"""
+
 def convert_currency(books, exchange_rate):
     """
     Convert book prices to a different currency.
@@ -273,6 +557,709 @@ def convert_currency(books, exchange_rate):
 """--------------------------------------------------------------------------------------------------------------------"""
 
 
+def aggregate_book_statistics(books, discount_rate=0.0, exchange_rate=1.0, year_ranges=((2000, 2023),)):
+    """
+    Compute all book statistics in a single pass over the data.
+    Prices are parsed once, discounted and converted as floats, and never
+    rewritten as strings; use format_book_statistics to format for output.
+    Args:
+        books (iterable): Book dictionaries, or (author, year, genre, price) tuples
+            already parsed (e.g. from BookCatalog.rows)
+        discount_rate (float): Discount rate to apply to every price
+        exchange_rate (float): Exchange rate to apply to every price
+        year_ranges (iterable of tuple): Inclusive (start_year, end_year) ranges to count
+    Returns:
+        dict: count, price_sum, price_mean, price_min, price_max, genres (count,
+        price_sum and price_mean by genre), author_counts, most_prolific_author
+        and year_range_counts
+    """
+    factor = (1 - discount_rate) * exchange_rate
+    year_ranges = [tuple(year_range) for year_range in year_ranges]
+    genres = {}
+    author_counts = {}
+    year_range_counts = dict.fromkeys(year_ranges, 0)
+    count = 0
+    price_sum = 0.0
+    price_min = float('inf')
+    price_max = float('-inf')
+
+    for book in books:
+        if isinstance(book, Mapping):
+            author, year, genre, price = book['author'], int(book['year']), book['genre'], float(book['price'])
+        else:
+            author, year, genre, price = book
+        price *= factor
+
+        count += 1
+        price_sum += price
+        price_min = min(price_min, price)
+        price_max = max(price_max, price)
+        genre_stats = genres.get(genre)
+        if genre_stats is None:
+            genres[genre] = genre_stats = {'count': 0, 'price_sum': 0.0}
+        genre_stats['count'] += 1
+        genre_stats['price_sum'] += price
+        author_counts[author] = author_counts.get(author, 0) + 1
+        for start_year, end_year in year_ranges:
+            if start_year <= year <= end_year:
+                year_range_counts[(start_year, end_year)] += 1
+
+    for genre_stats in genres.values():
+        genre_stats['price_mean'] = genre_stats['price_sum'] / genre_stats['count']
+
+    return {
+        'count': count,
+        'price_sum': price_sum,
+        'price_mean': price_sum / count if count else None,
+        'price_min': price_min if count else None,
+        'price_max': price_max if count else None,
+        'genres': genres,
+        'author_counts': author_counts,
+        'most_prolific_author': max(author_counts, key=author_counts.get) if author_counts else None,
+        'year_range_counts': year_range_counts,
+    }
+
+"""--------------------------------------------------------------------------------------------------------------------"""
+
+def format_book_statistics(stats):
+    """
+    Format the prices in a statistics dictionary as 2-decimal strings for output.
+    Args:
+        stats (dict): Statistics from aggregate_book_statistics
+    Returns:
+        dict: Copy of the statistics with every price formatted as '.2f'
+    """
+    def fmt(value):
+        return format(value, '.2f') if value is not None else None
+
+    formatted = dict(stats)
+    for key in ('price_sum', 'price_mean', 'price_min', 'price_max'):
+        formatted[key] = fmt(stats[key])
+    formatted['genres'] = {genre: {'count': genre_stats['count'],
+                                   'price_sum': fmt(genre_stats['price_sum']),
+                                   'price_mean': fmt(genre_stats['price_mean'])}
+                           for genre, genre_stats in stats['genres'].items()}
+    return formatted
+
+"""--------------------------------------------------------------------------------------------------------------------"""
+
+class BookCatalog:
+    """
+    In-memory book catalog with typed columns and lookup indexes.
+    
+    Each field is parsed once into a column (title/author/genre as lists of
+    str, year as int64, price as float64). Hash indexes map each title,
+    author and genre to its row numbers, and sorted indexes on year and price
+    turn range filters into binary searches. The sorted indexes are rebuilt
+    lazily after an update touches year or price.
+    
+    Books can be added, removed and updated in place. Per-genre price
+    sums/counts and a heap of author book counts are maintained as that
+    happens, so average price by genre and most prolific author never need
+    a rescan (O(1) per genre change, O(log n) per author change).
+    """
+
+    FIELDS = ('title', 'author', 'year', 'genre', 'price')
+
+    def __init__(self, books):
+        """
+        Build the catalog from a list of book dictionaries.
+        Args:
+            books (list of dict): Book dictionaries, e.g. from load_book_data
+        """
+        self.titles = [book['title'] for book in books]
+        self.authors = [book['author'] for book in books]
+        self.genres = [book['genre'] for book in books]
+        # numeric columns have spare capacity so add_book is amortised O(1)
+        self._years = np.array([int(book['year']) for book in books], dtype=np.int64)
+        self._prices = np.array([float(book['price']) for book in books], dtype=np.float64)
+        self._build_indexes()
+
+    @classmethod
+    def from_csv(cls, filename, workers=None):
+        """
+        Load a catalog from a CSV file with the chunked column loader.
+        Args:
+            filename (str): Name of the CSV file
+            workers (int): Number of parser processes, see load_book_columns
+        Returns:
+            BookCatalog: The loaded catalog
+        """
+        return cls.from_columns(load_book_columns(filename, workers))
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Build a catalog directly from typed columns, without per-row dictionaries.
+        Args:
+            columns (dict): Columns as returned by load_book_columns
+        Returns:
+            BookCatalog: The new catalog
+        """
+        catalog = cls.__new__(cls)
+        catalog.titles = list(columns['title'])
+        catalog.authors = list(columns['author'])
+        catalog.genres = list(columns['genre'])
+        catalog._years = np.array(columns['year'], dtype=np.int64)
+        catalog._prices = np.array(columns['price'], dtype=np.float64)
+        catalog._build_indexes()
+        return catalog
+
+    def __len__(self):
+        return len(self.titles)
+
+    @property
+    def years(self):
+        return self._years[:len(self)]
+
+    @property
+    def prices(self):
+        return self._prices[:len(self)]
+
+    @staticmethod
+    def _hash_index(values):
+        # value -> {row: None}, a dict used as an insertion-ordered set of rows
+        index = {}
+        for row, value in enumerate(values):
+            index.setdefault(value, {})[row] = None
+        return index
+
+    def _build_indexes(self):
+        self.title_index = self._hash_index(self.titles)
+        self.author_index = self._hash_index(self.authors)
+        self.genre_index = self._hash_index(self.genres)
+        self._sorted = {}
+        self._sort_cache = {}
+
+        self._genre_totals = {genre: [float(self.prices[list(rows)].sum()), len(rows)]
+                              for genre, rows in self.genre_index.items()}
+        # first-seen rank breaks ties between authors, like max() over a dict
+        self._author_rank = {author: rank for rank, author in enumerate(self.author_index)}
+        self._author_heap = [(-len(rows), self._author_rank[author], author)
+                             for author, rows in self.author_index.items()]
+        heapq.heapify(self._author_heap)
+
+    def _push_author(self, author):
+        count = len(self.author_index.get(author, ()))
+        if count:
+            rank = self._author_rank.setdefault(author, len(self._author_rank))
+            heapq.heappush(self._author_heap, (-count, rank, author))
+        # stale entries are dropped lazily; compact when they dominate the heap
+        if len(self._author_heap) > 2 * len(self.author_index) + 64:
+            self._author_heap = [(-len(rows), self._author_rank[name], name)
+                                 for name, rows in self.author_index.items()]
+            heapq.heapify(self._author_heap)
+
+    def _index_add(self, field, value, row):
+        index = getattr(self, field + '_index')
+        index.setdefault(value, {})[row] = None
+        if field == 'author':
+            self._push_author(value)
+        elif field == 'genre':
+            totals = self._genre_totals.setdefault(value, [0.0, 0])
+            totals[0] += self._prices[row]
+            totals[1] += 1
+
+    def _index_remove(self, field, value, row):
+        index = getattr(self, field + '_index')
+        rows = index[value]
+        del rows[row]
+        if not rows:
+            del index[value]
+        if field == 'author':
+            self._push_author(value)
+        elif field == 'genre':
+            totals = self._genre_totals[value]
+            totals[0] -= self._prices[row]
+            totals[1] -= 1
+            if not totals[1]:
+                del self._genre_totals[value]
+
+    def _changed(self, fields):
+        # drop the derived orderings that depend on the changed fields
+        for key in ('year', 'price'):
+            if key in fields:
+                self._sorted.pop(key, None)
+        if fields:
+            self._sort_cache.clear()
+
+    def _set_value(self, row, key, value):
+        if key == 'year':
+            self._years[row] = int(value)
+        elif key == 'price':
+            value = float(value)
+            totals = self._genre_totals[self.genres[row]]
+            totals[0] += value - self._prices[row]
+            self._prices[row] = value
+        else:
+            column = getattr(self, key + 's')
+            if column[row] != value:
+                self._index_remove(key, column[row], row)
+                column[row] = value
+                self._index_add(key, value, row)
+
+    def _sorted_index(self, field):
+        # (row order, sorted values) for 'year' or 'price', rebuilt on demand
+        if field not in self._sorted:
+            column = self.years if field == 'year' else self.prices
+            order = np.argsort(column, kind='stable')
+            self._sorted[field] = (order, column[order])
+        return self._sorted[field]
+
+    def book(self, row):
+        """
+        Return one book as a dictionary with typed year and price.
+        Args:
+            row (int): Row number in the catalog
+        Returns:
+            dict: Book properties
+        """
+        return {'title': self.titles[row], 'author': self.authors[row], 'year': int(self.years[row]),
+                'genre': self.genres[row], 'price': float(self.prices[row])}
+
+    def books(self, rows=None):
+        """
+        Return books as a list of dictionaries.
+        Args:
+            rows (iterable of int): Row numbers to return, all books if None
+        Returns:
+            list of dict: Book dictionaries
+        """
+        if rows is None:
+            rows = range(len(self))
+        return [self.book(int(row)) for row in rows]
+
+    def rows_in_range(self, field, low, high):
+        """
+        Find the rows whose year or price lies in [low, high] by binary search.
+        Args:
+            field (str): 'year' or 'price'
+            low, high (float): Inclusive range bounds
+        Returns:
+            np.ndarray: Matching row numbers in ascending order
+        """
+        order, values = self._sorted_index(field)
+        start = np.searchsorted(values, low, side='left')
+        stop = np.searchsorted(values, high, side='right')
+        return np.sort(order[start:stop])
+
+    def filter_by_year(self, start_year, end_year):
+        """
+        Filter books based on publication year range.
+        Args:
+            start_year (int): Start year of the range
+            end_year (int): End year of the range
+        Returns:
+            list of dict: Books published in the range, in catalog order
+        """
+        return self.books(self.rows_in_range('year', start_year, end_year))
+
+    def find_by_title(self, title):
+        """Return the books with the given title."""
+        return self.books(sorted(self.title_index.get(title, ())))
+
+    def books_by_author(self, author):
+        """Return the books by the given author."""
+        return self.books(sorted(self.author_index.get(author, ())))
+
+    def books_by_genre(self, genre):
+        """Return the books in the given genre."""
+        return self.books(sorted(self.genre_index.get(genre, ())))
+
+    def unique_genres(self):
+        """Return the set of unique genres."""
+        return set(self.genre_index)
+
+    def most_prolific_author(self):
+        """
+        Find the author with the most books, the first seen winning ties.
+        Reads the top of the maintained author heap, discarding stale entries.
+        Returns:
+            str: Name of the most prolific author, None if the catalog is empty
+        """
+        while self._author_heap:
+            count, rank, author = self._author_heap[0]
+            if len(self.author_index.get(author, ())) == -count:
+                return author
+            heapq.heappop(self._author_heap)
+        return None
+
+    def average_price_by_genre(self):
+        """
+        Calculate the average price for each genre from the maintained running totals.
+        Returns:
+            dict: Average price (float) by genre
+        """
+        return {genre: float(total / count) for genre, (total, count) in self._genre_totals.items()}
+
+    def rows(self):
+        """Yield (author, year, genre, price) tuples of already-typed values."""
+        return zip(self.authors, self.years.tolist(), self.genres, self.prices.tolist())
+
+    def aggregate(self, **kwargs):
+        """
+        Compute all statistics in one pass over the typed columns.
+        Args:
+            **kwargs: Passed to aggregate_book_statistics
+        Returns:
+            dict: Statistics as returned by aggregate_book_statistics
+        """
+        return aggregate_book_statistics(self.rows(), **kwargs)
+
+    def update_book(self, title, changes):
+        """
+        Update the properties of every book with the given title.
+        Args:
+            title (str): Title of the book to update
+            changes (dict): New values by field name
+        """
+        if title not in self.title_index:
+            raise ValueError(f"Title '{title}' not found in the books database.")
+        self.bulk_update({title: changes})
+
+    def bulk_update(self, updates):
+        """
+        Apply many updates at once, reporting missing titles instead of aborting.
+        All keys and year/price values are validated up front, so a bad entry
+        leaves the catalog untouched; indexes and aggregates are updated per row.
+        Args:
+            updates (dict): Changes by title, each a dict of new values by field name
+        Returns:
+            list: Titles that were not found in the catalog
+        """
+        fields = set()
+        parsed = {}
+        for title, changes in updates.items():
+            if not isinstance(changes, dict):
+                raise ValueError(f"Updates for book with Title {title} must be a dictionary. Found: {type(changes)}")
+            fields.update(changes)
+            # parse numbers now so a bad value raises before anything is written
+            changes = dict(changes)
+            if 'year' in changes:
+                changes['year'] = int(changes['year'])
+            if 'price' in changes:
+                changes['price'] = float(changes['price'])
+            parsed[title] = changes
+        unknown = fields - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown book properties: {sorted(unknown)}")
+
+        missing = [title for title in updates if title not in self.title_index]
+        try:
+            for title, changes in parsed.items():
+                # copy the rows: a title change moves them to another index entry
+                for row in list(self.title_index.get(title, ())):
+                    for key, value in changes.items():
+                        self._set_value(row, key, value)
+        finally:
+            self._changed(fields)
+        return missing
+
+    def add_book(self, book):
+        """
+        Append a book, updating indexes and aggregates incrementally.
+        Args:
+            book (dict): Book properties (year and price may be strings)
+        Returns:
+            int: Row number of the new book
+        """
+        row = len(self)
+        if row == len(self._years):
+            capacity = max(16, 2 * row)
+            self._years = np.resize(self._years, capacity)
+            self._prices = np.resize(self._prices, capacity)
+        self._years[row] = int(book['year'])
+        self._prices[row] = float(book['price'])
+        self.titles.append(book['title'])
+        self.authors.append(book['author'])
+        self.genres.append(book['genre'])
+        for field in ('title', 'author', 'genre'):
+            self._index_add(field, book[field], row)
+        self._changed(self.FIELDS)
+        return row
+
+    def _remove_row(self, row):
+        # swap-remove: the last row is moved into the hole so the columns stay dense
+        last = len(self) - 1
+        for field in ('title', 'author', 'genre'):
+            self._index_remove(field, getattr(self, field + 's')[row], row)
+        if row != last:
+            for field in ('title', 'author', 'genre'):
+                column = getattr(self, field + 's')
+                rows = getattr(self, field + '_index')[column[last]]
+                del rows[last]
+                rows[row] = None
+                column[row] = column[last]
+            self._years[row] = self._years[last]
+            self._prices[row] = self._prices[last]
+        self.titles.pop()
+        self.authors.pop()
+        self.genres.pop()
+
+    def remove_book(self, title):
+        """
+        Remove every book with the given title.
+        The last books are moved into the freed rows, so catalog order is not preserved.
+        Args:
+            title (str): Title of the book(s) to remove
+        Returns:
+            int: Number of books removed
+        """
+        rows = sorted(self.title_index.get(title, ()), reverse=True)
+        for row in rows:
+            self._remove_row(row)
+        if rows:
+            self._changed(self.FIELDS)
+        return len(rows)
+
+    def scale_prices(self, factor):
+        """
+        Multiply every price by a factor, e.g. a discount or exchange rate.
+        Prices stay floats; the genre totals are rescaled in O(genres).
+        Args:
+            factor (float): Multiplier applied to every price
+        """
+        self.prices[:] *= factor
+        for totals in self._genre_totals.values():
+            totals[0] *= factor
+        self._changed({'price'})
+
+    def _column(self, field):
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        return getattr(self, field + 's')
+
+    def sort_permutation(self, keys):
+        """
+        Return the row order for a multi-key sort, cached until the catalog changes.
+        Ties keep catalog order, as sorted() does.
+        Args:
+            keys (list of tuple): (field, descending) pairs, most significant first
+        Returns:
+            np.ndarray: Row numbers in sorted order
+        """
+        keys = tuple((field, bool(descending)) for field, descending in keys)
+        if keys not in self._sort_cache:
+            sort_keys = []
+            # np.lexsort takes the most significant key last
+            for field, descending in reversed(keys):
+                column = self._column(field)
+                if not isinstance(column, np.ndarray):
+                    # text columns sort by their rank among the unique values
+                    column = np.unique(np.array(column, dtype=object), return_inverse=True)[1]
+                sort_keys.append(-column if descending else column)
+            self._sort_cache[keys] = np.lexsort(sort_keys) if sort_keys else np.arange(len(self))
+        return self._sort_cache[keys]
+
+    def sorted_books(self, keys, limit=None):
+        """
+        Sort books by one or more fields.
+        Args:
+            keys (list of tuple): (field, descending) pairs, most significant first
+            limit (int): Only return the first limit books if given
+        Returns:
+            list of dict: Sorted book dictionaries
+        """
+        return self.books(self.sort_permutation(keys)[:limit])
+
+    def top_k(self, field, k, largest=True):
+        """
+        Return the k books with the largest (or smallest) year or price.
+        Uses np.argpartition so only the k winners are sorted; a cached full
+        sort on the same key is reused if there is one. Ties keep catalog order.
+        Args:
+            field (str): 'year' or 'price'
+            k (int): Number of books to return
+            largest (bool): Return the largest values if True, else the smallest
+        Returns:
+            list of dict: The top k book dictionaries, best first
+        """
+        cached = self._sort_cache.get(((field, bool(largest)),))
+        if cached is not None:
+            return self.books(cached[:k])
+        values = -self._column(field) if largest else self._column(field)
+        if k >= len(values):
+            return self.books(np.lexsort((np.arange(len(values)), values)))
+        if k <= 0:
+            return []
+        # exact cut: everything strictly better than the k-th value, then the earliest ties
+        threshold = values[np.argpartition(values, k - 1)[:k]].max()
+        better = np.flatnonzero(values < threshold)
+        ties = np.flatnonzero(values == threshold)[:k - len(better)]
+        rows = np.concatenate((better, ties))
+        return self.books(rows[np.lexsort((rows, values[rows]))])
+
+"""--------------------------------------------------------------------------------------------------------------------"""
+
+class Book(MutableMapping):
+    """
+    Lightweight dict-like view of one row of a BookTable.
+    Supports book['field'], book['field'] = value, 'field' in book, get,
+    keys and items, so the list-of-dict functions accept it unchanged.
+    Writes go straight to the table's columns; fields cannot be deleted.
+    """
+
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key):
+        return self._table.get_value(self._row, key)
+
+    def __setitem__(self, key, value):
+        self._table.set_value(self._row, key, value)
+
+    def __delitem__(self, key):
+        raise TypeError("Book fields cannot be deleted.")
+
+    def __iter__(self):
+        return iter(BookTable.FIELDS)
+
+    def __len__(self):
+        return len(BookTable.FIELDS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+"""--------------------------------------------------------------------------------------------------------------------"""
+
+class BookTable:
+    """
+    Compact struct-of-arrays book storage.
+    Titles are kept as one list of str, author and genre as int32 codes into
+    lists of interned category strings, year as int32 and price as float64,
+    which takes a fraction of the memory of one dict of strings per book.
+    Iterating or indexing yields Book views, so the existing list-of-dict
+    functions accept a BookTable, and genre/author grouping can use the
+    integer codes directly (see genre_price_stats and author_counts).
+    """
+
+    FIELDS = ('title', 'author', 'year', 'genre', 'price')
+
+    def __init__(self, books=()):
+        """
+        Build a table from book dictionaries.
+        Args:
+            books (iterable of dict): Book dictionaries, e.g. from load_book_data
+        """
+        books = list(books)
+        self._build({field: [book[field] for book in books] for field in self.FIELDS})
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Build a table from typed columns, e.g. from load_book_columns or iter_book_batches.
+        Args:
+            columns (dict): title, author, year, genre and price columns
+        Returns:
+            BookTable: The new table
+        """
+        table = cls.__new__(cls)
+        table._build(columns)
+        return table
+
+    @classmethod
+    def from_csv(cls, filename, workers=None):
+        """
+        Load a table from a CSV file.
+        Args:
+            filename (str): Name of the CSV file
+            workers (int): Number of parser processes, see load_book_columns
+        Returns:
+            BookTable: The loaded table
+        """
+        return cls.from_columns(load_book_columns(filename, workers))
+
+    def _build(self, columns):
+        self.titles = list(columns['title'])
+        # typed arrays convert in one call; str columns from load_book_data are parsed by NumPy
+        self.years = np.asarray(columns['year'], dtype=np.int32)
+        self.prices = np.asarray(columns['price'], dtype=np.float64)
+        self.author_categories, self.author_lookup, self.author_codes = self._encode(columns['author'])
+        self.genre_categories, self.genre_lookup, self.genre_codes = self._encode(columns['genre'])
+
+    @staticmethod
+    def _encode(values):
+        # categories in first-seen order, so ties resolve like a dict built in row order
+        lookup = {}
+        codes = np.fromiter((lookup.setdefault(value, len(lookup)) for value in values), dtype=np.int32)
+        categories = [sys.intern(value) for value in lookup]
+        return categories, dict(zip(categories, range(len(categories)))), codes
+
+    def _category_code(self, field, value):
+        # value -> code dict kept next to the category list, so writes stay O(1)
+        lookup = getattr(self, field + '_lookup')
+        code = lookup.get(value)
+        if code is None:
+            value = sys.intern(value)
+            code = lookup[value] = len(lookup)
+            getattr(self, field + '_categories').append(value)
+        return code
+
+    def __len__(self):
+        return len(self.titles)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [Book(self, i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return Book(self, row)
+
+    def __iter__(self):
+        return (Book(self, row) for row in range(len(self)))
+
+    def get_value(self, row, key):
+        if key == 'title':
+            return self.titles[row]
+        if key == 'year':
+            return int(self.years[row])
+        if key == 'price':
+            return float(self.prices[row])
+        if key in ('author', 'genre'):
+            return getattr(self, key + '_categories')[getattr(self, key + '_codes')[row]]
+        raise KeyError(key)
+
+    def set_value(self, row, key, value):
+        if key == 'title':
+            self.titles[row] = value
+        elif key == 'year':
+            self.years[row] = int(value)
+        elif key == 'price':
+            self.prices[row] = float(value)
+        elif key in ('author', 'genre'):
+            getattr(self, key + '_codes')[row] = self._category_code(key, value)
+        else:
+            raise KeyError(key)
+
+    def author_counts(self):
+        """
+        Count books per author with np.bincount over the author codes.
+        Returns:
+            dict: Book count by author, in first-seen order
+        """
+        counts = np.bincount(self.author_codes, minlength=len(self.author_categories))
+        return {author: int(count) for author, count in zip(self.author_categories, counts) if count}
+
+    def genre_price_stats(self):
+        """
+        Sum and count prices per genre with np.bincount over the genre codes.
+        Returns:
+            dict: (price sum, count) by genre, in first-seen order
+        """
+        n_genres = len(self.genre_categories)
+        counts = np.bincount(self.genre_codes, minlength=n_genres)
+        sums = np.bincount(self.genre_codes, weights=self.prices, minlength=n_genres)
+        return {genre: (float(total), int(count))
+                for genre, total, count in zip(self.genre_categories, sums, counts) if count}
+
+"""--------------------------------------------------------------------------------------------------------------------"""
+
+
 def main():
     input_file = "Project1/books.csv"
     output_file = "book_analysis_report.txt"
@@ -306,5 +1293,30 @@ def main():
     except Exception as e:
         print(f"An error occurred: {str(e)}")
 
+"""--------------------------------------------------------------------------------------------------------------------"""
+
+def main_catalog():
+    input_file = "Project1/books.csv"
+
+    try:
+        catalog = BookCatalog.from_csv(input_file)
+
+        # discount and currency conversion stay as floats until the stats are printed
+        stats = catalog.aggregate(discount_rate=0.1, exchange_rate=0.85, year_ranges=[(2000, 2023)])
+        stats = format_book_statistics(stats)
+        print(f"Unique genres: {sorted(stats['genres'])}")
+        print(f"Books from 2000 to 2023: {stats['year_range_counts'][(2000, 2023)]}")
+        print(f"Most prolific author: {stats['most_prolific_author']}")
+        print(f"Average price by genre: { {genre: g['price_mean'] for genre, g in stats['genres'].items()} }")
+
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+
+"""--------------------------------------------------------------------------------------------------------------------"""
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # python 0_Template_Kret.py --catalog
+    if len(sys.argv) > 1 and sys.argv[1] == "--catalog":
+        main_catalog()
+    else:
+        main()
@@ -4,6 +4,18 @@
 #Project 1 -- Mechanical Data -- Template 1
 
 import csv
+import gzip
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+import numpy as np
+
+# binary log layout: 64-byte header (magic, row count, column count) followed by
+# one contiguous little-endian float64 block per column in this order
+BINARY_MAGIC = b"MECHLOG1"
+BINARY_HEADER_SIZE = 64
+BINARY_COLUMNS = ("time", "position", "force")
 
 def read_mechanical_data(filename):
     """
@@ -113,7 +125,7 @@ def find_max_force(force_data):
     try:
         max_force = 0.0
         max_force_time = 0.0
-        for i in range(1, len(force_data)):
+        for i in range(len(force_data)):
             
             time = force_data[i][0]
             force = force_data[i][1]
@@ -194,6 +206,448 @@ def write_results(filename, results_data):
 
 """-------------------------------------------------------------------------------------------------------------------------"""
 
+def iter_mechanical_data(filename):
+    """
+    Lazily read mechanical data from a CSV file, one row at a time.
+    
+    Args:
+    filename (str): Name of the CSV file
+    
+    Yields:
+    tuple: (time, position, force)
+    """
+    with open(filename, 'r', newline='') as open_file:
+        csv_reader = csv.reader(open_file)
+        next(csv_reader)
+        for row in csv_reader:
+            if row:
+                yield float(row[0]), float(row[1]), float(row[2])
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def stream_kinematics(rows, summary):
+    """
+    Compute velocity and acceleration incrementally from a stream of rows.
+    
+    Only the previous row and previous velocity are kept, so memory is constant
+    however long the log is. The running max |force| and cumulative work are
+    accumulated into summary as rows go by.
+    
+    Args:
+    rows (iterable): (time, position, force) tuples
+    summary (dict): Filled with max_force_time, max_force and work_done
+    
+    Yields:
+    tuple: (time, velocity, acceleration) for every row after the first;
+    acceleration is None for the first velocity sample
+    """
+    summary.update({"max_force_time": 0.0, "max_force": 0.0, "work_done": 0.0})
+    prev_time = prev_position = prev_velocity = None
+    for time, position, force in rows:
+        #use abs to get the absolute value of the force i.e. max force from both sides
+        if abs(force) > abs(summary["max_force"]):
+            summary["max_force"] = force
+            summary["max_force_time"] = time
+        if prev_time is not None:
+            #v = (x - x0) / (t - t0)
+            velocity = (position - prev_position) / (time - prev_time)
+            acceleration = None
+            if prev_velocity is not None:
+                #a = (v - v0) / (t - t0)
+                acceleration = (velocity - prev_velocity) / (time - prev_time)
+            #work = force * distance
+            summary["work_done"] += force * (position - prev_position)
+            prev_velocity = velocity
+            yield time, velocity, acceleration
+        prev_time, prev_position = time, position
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def run_streaming_analysis(input_file, output_file):
+    """
+    Read, analyse and write mechanical data in a single pass with constant memory.
+    
+    Args:
+    input_file (str): Name of the input CSV file
+    output_file (str): Name of the output CSV file
+    
+    Returns:
+    dict: max_force_time, max_force and work_done
+    """
+    summary = {}
+    try:
+        with open(output_file, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['time', 'velocity', 'acceleration'])
+            for time, velocity, acceleration in stream_kinematics(iter_mechanical_data(input_file), summary):
+                writer.writerow([time, velocity, '' if acceleration is None else acceleration])
+            writer.writerow([])
+            writer.writerow(['Results:'])
+            for key in ['max_force_time', 'max_force', 'work_done']:
+                writer.writerow([key.replace("_", " ").capitalize(), summary[key]])
+
+    except FileNotFoundError:
+        print(f"Error: The file {input_file} was not found.")
+    except ZeroDivisionError:
+        print("Error: Time step cannot be zero.")
+    except Exception as e:
+        print(f"An error occurred during the streaming analysis: {str(e)}")
+    return summary
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def load_mechanical_columns(filename):
+    """
+    Read mechanical data from a CSV file straight into float64 column arrays.
+    
+    Args:
+    filename (str): Name of the CSV file
+    
+    Returns:
+    dict: time, position and force as contiguous NumPy arrays
+    """
+    try:
+        data = np.loadtxt(filename, delimiter=',', skiprows=1, dtype=np.float64, ndmin=2)
+        return {
+            "time": np.ascontiguousarray(data[:, 0]),
+            "position": np.ascontiguousarray(data[:, 1]),
+            "force": np.ascontiguousarray(data[:, 2]),
+        }
+
+    except FileNotFoundError:
+        print(f"Error: The file {filename} was not found.")
+        return {}
+    except Exception as e:
+        print(f"An unexpected error occurred: {str(e)}")
+        return {}
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def calculate_kinematics_columnar(time, position):
+    """
+    Calculate velocity and acceleration with vectorized finite differences.
+    
+    Uses the same backward differences as calculate_velocity and
+    calculate_acceleration. Both outputs are aligned by index with time[1:],
+    acceleration being NaN at the first sample where it is undefined.
+    
+    Args:
+    time (np.ndarray): Sample times
+    position (np.ndarray): Positions at each sample time
+    
+    Returns:
+    tuple: (time[1:], velocity, acceleration) arrays of equal length
+    """
+    dt = np.diff(time)
+    if np.any(dt == 0):
+        raise ZeroDivisionError("Time step cannot be zero.")
+    #v = (x - x0) / (t - t0)
+    velocity = np.diff(position) / dt
+    #a = (v - v0) / (t - t0)
+    acceleration = np.empty_like(velocity)
+    acceleration[:1] = np.nan
+    acceleration[1:] = np.diff(velocity) / dt[1:]
+    return time[1:], velocity, acceleration
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def iter_kinematics_blocks(time, position, block_rows=262144):
+    """
+    Yield calculate_kinematics_columnar results a block of rows at a time.
+    
+    Each block is computed from a slice that also holds the two rows before
+    it (the previous velocity needs them), so the output is identical to the
+    whole-array version while only one block of temporaries is alive. Use it
+    on memory-mapped logs that do not fit in RAM.
+    
+    Args:
+    time (np.ndarray): Sample times (may be a memmap)
+    position (np.ndarray): Positions at each sample time
+    block_rows (int): Number of output rows per block
+    
+    Yields:
+    tuple: (time, velocity, acceleration) blocks, together covering time[1:]
+    """
+    for start in range(1, len(time), block_rows):
+        stop = min(start + block_rows, len(time))
+        lo = max(start - 2, 0)
+        time_block, velocity, acceleration = calculate_kinematics_columnar(time[lo:stop], position[lo:stop])
+        # the carried rows only feed the differences, drop their outputs
+        skip = start - 1 - lo
+        yield time_block[skip:], velocity[skip:], acceleration[skip:]
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def find_max_force_columnar(time, force):
+    """
+    Find the force with the largest magnitude and when it occurred.
+    
+    Args:
+    time (np.ndarray): Sample times
+    force (np.ndarray): Forces at each sample time
+    
+    Returns:
+    tuple: (time, max_force)
+    """
+    if force.size == 0:
+        return (0.0, 0.0)
+    i = int(np.argmax(np.abs(force)))
+    return (float(time[i]), float(force[i]))
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def calculate_work_done_columnar(force, position, method="right"):
+    """
+    Calculate the total work done as a vectorized sum of force * distance.
+    
+    Args:
+    force (np.ndarray): Forces at each sample time
+    position (np.ndarray): Positions at each sample time
+    method (str): "right" uses the force at the end of each step, like
+        calculate_work_done; "trapezoid" averages the forces at both ends
+    
+    Returns:
+    float: Total work done
+    """
+    distance = np.diff(position)
+    if method == "trapezoid":
+        return float(np.dot(0.5 * (force[1:] + force[:-1]), distance))
+    return float(np.dot(force[1:], distance))
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def convert_mechanical_to_binary(csv_filename, binary_filename, chunk_rows=1000000):
+    """
+    Convert a mechanical data CSV into the binary columnar log format.
+    
+    The CSV is parsed once in chunks of chunk_rows lines and written straight
+    into a memory-mapped output file, so logs larger than RAM can be converted.
+    
+    Args:
+    csv_filename (str): Name of the input CSV file
+    binary_filename (str): Name of the output binary file
+    chunk_rows (int): Number of lines parsed per chunk
+    
+    Returns:
+    int: Number of rows written
+    """
+    try:
+        with open(csv_filename, 'r') as file:
+            next(file)
+            n_rows = sum(1 for line in file if line.strip())
+
+        header = np.zeros(BINARY_HEADER_SIZE, dtype=np.uint8)
+        header[:8] = np.frombuffer(BINARY_MAGIC, dtype=np.uint8)
+        header[8:24] = np.array([n_rows, len(BINARY_COLUMNS)], dtype='<u8').view(np.uint8)
+        with open(binary_filename, 'wb') as out:
+            out.write(header.tobytes())
+            out.truncate(BINARY_HEADER_SIZE + n_rows * len(BINARY_COLUMNS) * 8)
+        if n_rows == 0:
+            return 0
+
+        columns = np.memmap(binary_filename, dtype='<f8', mode='r+', offset=BINARY_HEADER_SIZE,
+                            shape=(len(BINARY_COLUMNS), n_rows))
+        with open(csv_filename, 'r') as file:
+            next(file)
+            lines = (line for line in file if line.strip())
+            start = 0
+            while start < n_rows:
+                chunk = np.loadtxt(list(islice(lines, chunk_rows)), delimiter=',', dtype=np.float64, ndmin=2)
+                columns[:, start:start + len(chunk)] = chunk[:, :len(BINARY_COLUMNS)].T
+                start += len(chunk)
+        columns.flush()
+        del columns
+        return n_rows
+
+    except FileNotFoundError:
+        print(f"Error: The file {csv_filename} was not found.")
+        return 0
+    except Exception as e:
+        print(f"An error occurred while converting to binary: {str(e)}")
+        return 0
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def open_mechanical_binary(filename):
+    """
+    Open a binary mechanical log as zero-copy memory-mapped column arrays.
+    
+    Nothing is read up front; pages are loaded by the OS as the analysis
+    touches them, so start-up is immediate and logs may exceed RAM.
+    
+    Args:
+    filename (str): Name of the binary file
+    
+    Returns:
+    dict: time, position and force as read-only np.memmap views
+    """
+    try:
+        header = np.fromfile(filename, dtype=np.uint8, count=BINARY_HEADER_SIZE)
+        if header[:8].tobytes() != BINARY_MAGIC:
+            raise ValueError(f"{filename} is not a mechanical binary log.")
+        n_rows, n_cols = header[8:24].view('<u8')
+        if n_rows == 0:
+            return {name: np.zeros(0) for name in BINARY_COLUMNS}
+        columns = np.memmap(filename, dtype='<f8', mode='r', offset=BINARY_HEADER_SIZE,
+                            shape=(int(n_cols), int(n_rows)))
+        return {name: columns[i] for i, name in enumerate(BINARY_COLUMNS)}
+
+    except FileNotFoundError:
+        print(f"Error: The file {filename} was not found.")
+        return {}
+    except Exception as e:
+        print(f"An unexpected error occurred: {str(e)}")
+        return {}
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def _force_work_chunk(task):
+    """
+    Reduce one contiguous chunk to (partial work, index, time and value of max |force|).
+    
+    Runs inside a worker process or thread. The chunk includes the row before its start
+    so the first step's distance uses the correct prev_position carry.
+    
+    Args:
+    task (tuple): (source, start, stop) where source is a binary log filename
+        or a (time, position, force) tuple of arrays already cut to [start - 1, stop)
+    
+    Returns:
+    tuple: (work, max_index, max_force_time, max_force)
+    """
+    source, start, stop = task
+    lo = max(start - 1, 0)
+    if isinstance(source, str):
+        columns = open_mechanical_binary(source)
+        time, position, force = (columns[name][lo:stop] for name in BINARY_COLUMNS)
+    else:
+        time, position, force = source
+    # rows before start belong to the previous chunk, only their position is used
+    skip = start - lo
+    work = float(np.dot(force[1:], np.diff(position)))
+    i = int(np.argmax(np.abs(force[skip:]))) + skip
+    return work, lo + i, float(time[i]), float(force[i])
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def calculate_force_and_work_parallel(source, workers=None, chunk_size=1000000):
+    """
+    Find the max force and total work by reducing contiguous chunks on all cores.
+    
+    Each chunk carries the position of the row before it, so stitching the
+    partial works is a plain sum; the max |force| of each chunk is combined
+    keeping the earliest sample on ties, as the serial loop does.
+    A binary log is reduced in worker processes that each map the file
+    themselves; in-memory arrays are reduced in threads (NumPy releases the
+    GIL in dot/argmax), so the chunks are never pickled to another process.
+    
+    Args:
+    source (str or dict): Binary log filename (each worker maps it itself) or
+        dict of time, position and force arrays
+    workers (int): Number of workers (None uses all cores, 1 runs in-process)
+    chunk_size (int): Number of rows per chunk
+    
+    Returns:
+    tuple: (max_force_time, max_force, work_done)
+    """
+    try:
+        if isinstance(source, str):
+            n_rows = len(open_mechanical_binary(source)["time"])
+            tasks = [(source, start, min(start + chunk_size, n_rows)) for start in range(0, n_rows, chunk_size)]
+        else:
+            n_rows = len(source["time"])
+            tasks = []
+            for start in range(0, n_rows, chunk_size):
+                stop = min(start + chunk_size, n_rows)
+                lo = max(start - 1, 0)
+                tasks.append(((source["time"][lo:stop], source["position"][lo:stop], source["force"][lo:stop]),
+                              start, stop))
+        if not tasks:
+            return (0.0, 0.0, 0.0)
+
+        if workers == 1 or len(tasks) == 1:
+            partials = list(map(_force_work_chunk, tasks))
+        else:
+            executor = ProcessPoolExecutor if isinstance(source, str) else ThreadPoolExecutor
+            with executor(max_workers=workers or os.cpu_count()) as pool:
+                partials = list(pool.map(_force_work_chunk, tasks))
+
+        work_done = sum(partial[0] for partial in partials)
+        best = max(partials, key=lambda partial: (abs(partial[3]), -partial[1]))
+        return (best[2], best[3], work_done)
+
+    except Exception as e:
+        print(f"An error occurred during the parallel reduction: {str(e)}")
+        return (0.0, 0.0, 0.0)
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def write_columnar_results(filename, time, velocity, acceleration, summary, block_rows=262144):
+    """
+    Write index-aligned kinematics columns and the summary results in large buffered blocks.
+    
+    Rows are formatted a block at a time into one pre-joined string, so the
+    cost is linear in the row count and only one block of text is alive at a
+    time. The text layout matches write_results (NaN is written as empty).
+    A filename ending in .gz is gzip-compressed on the fly; one ending in
+    .npz is written as binary NumPy arrays instead of text.
+    
+    Args:
+    filename (str): Name of the output file (.csv, .csv.gz or .npz)
+    time, velocity, acceleration (np.ndarray): Aligned result columns
+    summary (dict): max_force_time, max_force and work_done
+    block_rows (int): Number of rows formatted per write
+    """
+    blocks = ((time[start:start + block_rows], velocity[start:start + block_rows],
+               acceleration[start:start + block_rows]) for start in range(0, len(time), block_rows))
+    write_columnar_blocks(filename, blocks, summary)
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def write_columnar_blocks(filename, blocks, summary):
+    """
+    Write kinematics results arriving as (time, velocity, acceleration) blocks.
+    
+    Text output is streamed block by block (see write_columnar_results), so
+    with iter_kinematics_blocks the full columns never exist in memory. An
+    .npz file has to hold whole arrays, so the blocks are joined for it.
+    
+    Args:
+    filename (str): Name of the output file (.csv, .csv.gz or .npz)
+    blocks (iterable): (time, velocity, acceleration) array blocks in row order
+    summary (dict): max_force_time, max_force and work_done
+    """
+    try:
+        if filename.endswith(".npz"):
+            blocks = list(blocks)
+            time, velocity, acceleration = (np.concatenate([block[j] for block in blocks]) if blocks else np.zeros(0)
+                                            for j in range(3))
+            np.savez(filename, time=time, velocity=velocity, acceleration=acceleration,
+                     **{key: summary[key] for key in ['max_force_time', 'max_force', 'work_done']})
+            return
+
+        opener = gzip.open if filename.endswith(".gz") else open
+        with opener(filename, 'wt', newline='') as file:
+            file.write("time,velocity,acceleration\r\n")
+            for time_block, velocity_block, accel_block in blocks:
+                accel_text = list(map(repr, accel_block.tolist()))
+                for i in np.flatnonzero(np.isnan(accel_block)).tolist():
+                    accel_text[i] = ''
+                rows = map(",".join, zip(map(repr, time_block.tolist()),
+                                         map(repr, velocity_block.tolist()), accel_text))
+                file.write("\r\n".join(rows) + "\r\n")
+            file.write("\r\nResults:\r\n")
+            for key in ['max_force_time', 'max_force', 'work_done']:
+                file.write(f"{key.replace('_', ' ').capitalize()},{summary[key]}\r\n")
+
+    except FileNotFoundError:
+        print(f"Error: The file {filename} was not found.")
+
+    except Exception as e:
+        print(f"An error occurred while writing the results: {str(e)}")
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
 def main():
     input_file = "Project1/mechanical_data.csv"
     output_file = "analysis_results.csv"
@@ -234,5 +688,64 @@ def main():
     except Exception as e:
         print(f"An error occurred: {str(e)}")
 
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def main_streaming(input_file="Project1/mechanical_data.csv", output_file="analysis_results.csv"):
+    summary = run_streaming_analysis(input_file, output_file)
+    print(summary.get("work_done"))
+    print(f"Results written to {output_file}")
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
+def main_columnar(input_file="Project1/mechanical_data.csv", output_file="analysis_results.csv",
+                  parallel=False, workers=None, chunk_size=1000000):
+    try:
+        if input_file.endswith(".bin"):
+            # a mapped log may be larger than RAM: reduce and write it a chunk at a time
+            columns = open_mechanical_binary(input_file)
+            max_force_time, max_force, work_done = calculate_force_and_work_parallel(
+                input_file, workers if parallel else 1, chunk_size)
+            print(work_done)
+
+            summary = {"max_force_time": max_force_time, "max_force": max_force, "work_done": work_done}
+            write_columnar_blocks(output_file, iter_kinematics_blocks(columns["time"], columns["position"]), summary)
+            print(f"Results written to {output_file}")
+            return
+
+        columns = load_mechanical_columns(input_file)
+        time, velocity, acceleration = calculate_kinematics_columnar(columns["time"], columns["position"])
+        if parallel:
+            max_force_time, max_force, work_done = calculate_force_and_work_parallel(columns, workers, chunk_size)
+        else:
+            max_force_time, max_force = find_max_force_columnar(columns["time"], columns["force"])
+            work_done = calculate_work_done_columnar(columns["force"], columns["position"])
+        print(work_done)
+
+        summary = {"max_force_time": max_force_time, "max_force": max_force, "work_done": work_done}
+        write_columnar_results(output_file, time, velocity, acceleration, summary)
+        print(f"Results written to {output_file}")
+
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+
+"""-------------------------------------------------------------------------------------------------------------------------"""
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # python 1_template_Kret.py --stream [input.csv] [output.csv]
+    # python 1_template_Kret.py --columnar [input.csv|input.bin] [output.csv|output.csv.gz|output.npz]
+    # python 1_template_Kret.py --parallel [input.csv|input.bin] [output.csv] [workers] [chunk_size]
+    # python 1_template_Kret.py --convert input.csv output.bin
+    if len(sys.argv) > 1 and sys.argv[1] == "--stream":
+        main_streaming(*sys.argv[2:4])
+    elif len(sys.argv) > 1 and sys.argv[1] == "--columnar":
+        main_columnar(*sys.argv[2:4])
+    elif len(sys.argv) > 1 and sys.argv[1] == "--parallel":
+        args = sys.argv[2:6]
+        main_columnar(*args[:2], parallel=True,
+                      workers=int(args[2]) if len(args) > 2 else None,
+                      chunk_size=int(args[3]) if len(args) > 3 else 1000000)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--convert":
+        n_rows = convert_mechanical_to_binary(*sys.argv[2:4])
+        print(f"{n_rows} rows converted")
+    else:
+        main()
\ No newline at end of file
@@ -5,6 +5,10 @@
 
 import csv
 import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 
 def read_beam_data(filename):
     """
@@ -40,6 +44,65 @@ def read_beam_data(filename):
 
 """-----------------------------------------------------------------------------------------------------------------"""
 
+def build_shear_moment_diagram(length, loads, query_points=None):
+    """
+    Build the shear force and bending moment diagrams of a simply supported beam.
+    
+    Loads are sorted once and cumulative sums of P and P * a give, for any x,
+    the total load and its first moment strictly left of x, so V(x) and M(x)
+    at every station come out of one pass in O(n log n).
+    
+    Args:
+    length (float): Length of the beam
+    loads (list): List of (position, magnitude) tuples for each load
+    query_points (array-like): Optional extra positions to evaluate V and M at
+    
+    Returns:
+    dict: R1, R2, positions (sorted load stations), shear, moment (arrays at the
+    stations), max_shear, max_moment and, if query_points is given,
+    query_points, query_shear and query_moment
+    """
+    load_array = np.asarray(loads, dtype=float).reshape(-1, 2)
+    order = np.argsort(load_array[:, 0], kind="stable")
+    a = load_array[order, 0]
+    P = load_array[order, 1]
+
+    # calc reactions
+    R1 = float(np.sum(P * (length - a)) / length)
+    R2 = float(np.sum(P * a) / length)
+
+    # prefix sums with a leading zero: entry k is the sum over the first k loads
+    cum_P = np.concatenate(([0.0], np.cumsum(P)))
+    cum_Pa = np.concatenate(([0.0], np.cumsum(P * a)))
+
+    def evaluate(x):
+        # number of loads strictly left of x
+        k = np.searchsorted(a, x, side="left")
+        V = R1 - cum_P[k]
+        M = R1 * x - (cum_P[k] * x - cum_Pa[k])
+        return V, M
+
+    shear, moment = evaluate(a)
+
+    # R1 and R2 are reaction forces at ends AND are representative of the shears
+    diagram = {
+        "R1": R1,
+        "R2": R2,
+        "positions": a,
+        "shear": shear,
+        "moment": moment,
+        "max_shear": float(max(R1, R2, shear.max(initial=-np.inf))),
+        # dont include R1 or R2 in the bending moments b/c moments arm is 0
+        "max_moment": float(moment.max()) if moment.size else 0.0,
+    }
+    if query_points is not None:
+        query_points = np.asarray(query_points, dtype=float)
+        diagram["query_points"] = query_points
+        diagram["query_shear"], diagram["query_moment"] = evaluate(query_points)
+    return diagram
+
+"""-----------------------------------------------------------------------------------------------------------------"""
+
 def calculate_bending_moment(length, loads):
     """
     Calculate the maximum bending moment in the beam.
@@ -52,22 +115,10 @@ def calculate_bending_moment(length, loads):
     float: Maximum bending moment
     """
     try:
+        diagram = build_shear_moment_diagram(length, loads)
+        print(f"Calculated reaction forces: R1 = {diagram['R1']}, R2 = {diagram['R2']}")
 
-        for i in range(len(loads)):
-            loads[i] = (float(loads[i][0]), float(loads[i][1]))
-        # calc reactions
-        R1 = sum(load[1] * (length - load[0]) / length for load in loads)
-        R2 = sum(load[1] * load[0] / length for load in loads)
-        print(f"Calculated reaction forces: R1 = {R1}, R2 = {R2}")
-        # dont include R1 or R2 in the bending moments b/c moments arm is 0
-        bending_moments = []
-        for load in loads:
-            x = load[0]
-            M = R1 * x - sum(load_dist[1] * (x - load_dist[0]) for load_dist in loads if load_dist[0] < x)
-            bending_moments.append(M)
-            print(f"Bending moment at position {x}: {M}")
-
-        max_moment = max(bending_moments)
+        max_moment = diagram["max_moment"]
         print(f"Maximum bending moment: {max_moment}")
         return max_moment
     
@@ -88,22 +139,9 @@ def calculate_shear_force(length, loads):
     float: Maximum shear force
     """
     try:
-        for i in range(len(loads)):
-            loads[i] = (float(loads[i][0]), float(loads[i][1]))
-        # calc reactions
-        R1 = sum(load[1] * (length - load[0]) / length for load in loads)
-        R2 = sum(load[1] * load[0] / length for load in loads)
-
-        # R1 and R2 are reaction forces at ends AND are representative of the shears
-        shear_forces = [R1, R2]
-        for load in loads:
-            x = load[0]
-            # V = R1 - sum of all loads left of x
-            V = R1 - sum(load_dist[1] for load_dist in loads if load_dist[0] < x)
-            shear_forces.append(V)
-            print(f"Shear force at position {x}: {V}")
-
-        max_shear = max(shear_forces)
+        diagram = build_shear_moment_diagram(length, loads)
+
+        max_shear = diagram["max_shear"]
         print(f"Maximum shear force: {max_shear}")
         return max_shear
         
@@ -166,7 +204,51 @@ def calculate_max_shear_stress(max_shear, first_moment, moment_of_inertia, width
 
 """-----------------------------------------------------------------------------------------------------------------"""
 
-def calculate_max_deflection(length, loads, elastic_modulus, moment_of_inertia):
+def calculate_deflection_curve(length, loads, elastic_modulus, moment_of_inertia, resolution=0.01):
+    """
+    Calculate the deflection curve of the beam by superposition of all point loads.
+    
+    Every load is evaluated at every station in one broadcast array operation,
+    so there is no per-point Python loop and no per-point logging.
+    
+    Args:
+    length (float): Length of the beam
+    loads (list): List of (position, magnitude) tuples for each load
+    elastic_modulus (float): Elastic modulus of the beam material
+    moment_of_inertia (float): Moment of inertia of the beam cross-section
+    resolution (float): Spacing between stations along the beam
+    
+    Returns:
+    tuple: (x_values, deflection, max_deflection, x_max)
+    where x_values and deflection are NumPy arrays
+    """
+    E = elastic_modulus
+    I = moment_of_inertia
+    L = length
+    if E == 0 or I == 0 or L == 0:
+        raise ZeroDivisionError
+
+    # stations 0, res, 2*res, ... <= L (small tolerance so L itself is kept)
+    n_points = int(math.floor(L / resolution + 1e-9)) + 1
+    x = np.arange(n_points) * resolution
+
+    load_array = np.asarray(loads, dtype=float).reshape(-1, 2)
+    a = load_array[:, 0][:, np.newaxis]
+    P = load_array[:, 1][:, np.newaxis]
+    b = L - a
+
+    # rows are loads, columns are stations
+    left = ((P * b) / (6 * E * I * L)) * (x**3 - (L**2 - b**2) * x)
+    right = ((P * a) / (6 * E * I * L)) * ((L - x)**3 - (L**2 - a**2) * (L - x))
+    deflection = np.where(x <= a, left, right).sum(axis=0)
+
+    # sum deflections from all loads at each point on beam, max is the most negative
+    max_idx = int(np.argmin(deflection))
+    return x, deflection, float(deflection[max_idx]), float(x[max_idx])
+
+"""-----------------------------------------------------------------------------------------------------------------"""
+
+def calculate_max_deflection(length, loads, elastic_modulus, moment_of_inertia, resolution=0.01):
     """
     Calculate the maximum deflection of the beam.
     
@@ -175,43 +257,14 @@ def calculate_max_deflection(length, loads, elastic_modulus, moment_of_inertia):
     loads (list): List of (position, magnitude) tuples for each load
     elastic_modulus (float): Elastic modulus of the beam material
     moment_of_inertia (float): Moment of inertia of the beam cross-section
+    resolution (float): Spacing between stations along the beam
     
     Returns:
     float: Maximum deflection
     """
     try:
-    # homemade linspace func
-        start = 0.0
-        stop = length
-        step = 0.01  
-        x_values = []
-        current = start
-        while current <= stop:
-            x_values.append(round(current, 2))
-            current += step
-        
-        total_deflection = [0.0 for _ in x_values]
-        E = elastic_modulus
-        I = moment_of_inertia
-        L = length
-
-        for load in loads:
-            a = load[0]
-            b = L - a
-            P = load[1]
-
-            for id_x, x in enumerate(x_values):
-                if x <= a:
-                    y = ((P * b) / (6 * E * I * L)) * (x**3 - (L**2 - b**2)*x)
-                else:  # x > a
-                    y = ((P * a) / (6 * E * I * L)) * ((L-x)**3 - ((L**2 - a**2)*(L-x)))
-                print(f"Deflection at load {load} x = {x}: {y}")
-                total_deflection[id_x] += y  # sum deflections from all loads at each point on beam
-            
-        # Find the maximum deflection
-        max_defl = min(total_deflection)
-        max_defl_idx = total_deflection.index(max_defl)
-        x_max = x_values[max_defl_idx]
+        x_values, deflection, max_defl, x_max = calculate_deflection_curve(
+            length, loads, elastic_modulus, moment_of_inertia, resolution)
         print(f"Maximum deflection: {max_defl} meters at x = {x_max} meters")
         
         return max_defl
@@ -249,6 +302,341 @@ def write_results(filename, results_data):
 
 """-----------------------------------------------------------------------------------------------------------------"""
 
+def read_batch_beam_data(filename):
+    """
+    Read many beam cases from a single CSV file.
+    
+    The file has one row per load with the columns
+    case_id, length, width, height, elastic_modulus, load_position, load_magnitude.
+    Geometry is repeated on every row of a case; a case with no loads has
+    empty load columns.
+    
+    Args:
+    filename (str): Name of the CSV file
+    
+    Returns:
+    dict: case_ids (list), length, width, height, elastic_modulus (1-D arrays),
+    load_positions, load_magnitudes (2-D arrays padded with zero loads) and
+    load_mask (2-D bool array, True where a real load is stored)
+    """
+    try:
+        cases = {}
+        with open(filename, 'r') as file:
+            for row in csv.DictReader(file):
+                case_id = row["case_id"]
+                if case_id not in cases:
+                    cases[case_id] = (float(row["length"]), float(row["width"]), float(row["height"]),
+                                      float(row["elastic_modulus"]), [])
+                if row.get("load_position") not in (None, "") and row.get("load_magnitude") not in (None, ""):
+                    cases[case_id][4].append((float(row["load_position"]), float(row["load_magnitude"])))
+
+        n_cases = len(cases)
+        max_loads = max([len(case[4]) for case in cases.values()] + [1])
+        geometry = np.array([case[:4] for case in cases.values()], dtype=float).reshape(n_cases, 4)
+        load_positions = np.zeros((n_cases, max_loads))
+        load_magnitudes = np.zeros((n_cases, max_loads))
+        load_mask = np.zeros((n_cases, max_loads), dtype=bool)
+        for i, case in enumerate(cases.values()):
+            n = len(case[4])
+            if n:
+                load_positions[i, :n], load_magnitudes[i, :n] = zip(*case[4])
+                load_mask[i, :n] = True
+
+        return {
+            "case_ids": list(cases.keys()),
+            "length": geometry[:, 0],
+            "width": geometry[:, 1],
+            "height": geometry[:, 2],
+            "elastic_modulus": geometry[:, 3],
+            "load_positions": load_positions,
+            "load_magnitudes": load_magnitudes,
+            "load_mask": load_mask,
+        }
+
+    except FileNotFoundError:
+        print(f"Error: The file {filename} was not found.")
+        return {}
+    except Exception as e:
+        print(f"An unexpected error occurred: {str(e)}")
+        return {}
+
+"""-----------------------------------------------------------------------------------------------------------------"""
+
+def calculate_batch_results(batch, resolution=0.01, max_elements=1 << 22):
+    """
+    Calculate reactions, max moment, max shear, stresses and max deflection for every case.
+    
+    All cases are solved together with stacked array math: loads are sorted
+    once per case and the moment/shear at each load station comes from
+    cumulative sums. Deflection is evaluated in chunks of cases sorted by
+    length, each on its own station grid, with the chunk size chosen so the
+    (cases x loads x stations) temporaries stay under max_elements.
+    
+    Args:
+    batch (dict): Cases as returned by read_batch_beam_data
+    resolution (float): Spacing between deflection stations along each beam
+    max_elements (int): Element budget of each (cases x loads x stations) deflection temporary
+    
+    Returns:
+    dict: case_ids plus one 1-D array per result column
+    """
+    L = batch["length"]
+    width = batch["width"]
+    height = batch["height"]
+    E = batch["elastic_modulus"]
+    mask = batch["load_mask"]
+    n_cases, n_loads = mask.shape
+    rows = np.arange(n_cases)[:, np.newaxis]
+
+    # padded loads have zero magnitude, so they drop out of every sum
+    order = np.argsort(batch["load_positions"], axis=1, kind="stable")
+    a = np.take_along_axis(batch["load_positions"], order, axis=1)
+    P = np.take_along_axis(np.where(mask, batch["load_magnitudes"], 0.0), order, axis=1)
+    valid = np.take_along_axis(mask, order, axis=1)
+
+    # calc reactions
+    R1 = (P * (L[:, np.newaxis] - a)).sum(axis=1) / L
+    R2 = (P * a).sum(axis=1) / L
+
+    # sums of loads strictly left of each station; loads sharing a position
+    # all use the sums from the first load of their group
+    excl_P = np.cumsum(P, axis=1) - P
+    excl_Pa = np.cumsum(P * a, axis=1) - P * a
+    idx = np.broadcast_to(np.arange(n_loads), (n_cases, n_loads))
+    group_start = np.ones((n_cases, n_loads), dtype=bool)
+    group_start[:, 1:] = a[:, 1:] != a[:, :-1]
+    first = np.maximum.accumulate(np.where(group_start, idx, 0), axis=1)
+    left_P = excl_P[rows, first]
+    left_Pa = excl_Pa[rows, first]
+
+    # M = R1 * x - sum(P * (x - a)) for loads left of x
+    moments = R1[:, np.newaxis] * a - (left_P * a - left_Pa)
+    shears = R1[:, np.newaxis] - left_P
+    max_moment = np.where(valid, moments, -np.inf).max(axis=1)
+    max_moment = np.where(valid.any(axis=1), max_moment, 0.0)
+    max_shear = np.maximum(np.maximum(R1, R2), np.where(valid, shears, -np.inf).max(axis=1))
+
+    # section properties
+    moment_of_inertia = (width * height**3) / 12
+    y_max = height / 2
+    first_moment = (width * height**2) / 8
+    max_bending_stress = max_moment * y_max / moment_of_inertia
+    max_shear_stress = max_shear * first_moment / (moment_of_inertia * width)
+
+    # deflection by superposition; cases are taken shortest first so each chunk's
+    # station grid only reaches its own longest beam, masked past each beam's end
+    max_deflection = np.zeros(n_cases)
+    x_max_deflection = np.zeros(n_cases)
+    by_length = np.argsort(L, kind="stable")
+    points = np.floor(L[by_length] / resolution + 1e-9).astype(np.int64) + 1
+    start = 0
+    while start < n_cases:
+        # lengths only grow along by_length, so the last case of a chunk sets its grid size;
+        # no chunk can hold more cases than fit on the first case's grid
+        end = min(n_cases, start + max(1, max_elements // (max(n_loads, 1) * points[start])))
+        fits = np.flatnonzero(np.arange(1, end - start + 1) * n_loads * points[start:end] <= max_elements)
+        stop = start + (fits[-1] + 1 if len(fits) else 1)
+        cases = by_length[start:stop]
+        x = np.arange(points[stop - 1]) * resolution
+        Lc = L[cases, np.newaxis, np.newaxis]
+        EIL = (E[cases] * moment_of_inertia[cases])[:, np.newaxis, np.newaxis] * Lc
+        ac = a[cases, :, np.newaxis]
+        Pc = P[cases, :, np.newaxis]
+        bc = Lc - ac
+        left = ((Pc * bc) / (6 * EIL)) * (x**3 - (Lc**2 - bc**2) * x)
+        right = ((Pc * ac) / (6 * EIL)) * ((Lc - x)**3 - (Lc**2 - ac**2) * (Lc - x))
+        deflection = np.where(x <= ac, left, right).sum(axis=1)
+        deflection = np.where(x <= Lc[:, 0] + 1e-9 * resolution, deflection, np.inf)
+        max_idx = np.argmin(deflection, axis=1)
+        max_deflection[cases] = deflection[np.arange(len(cases)), max_idx]
+        x_max_deflection[cases] = x[max_idx]
+        start = stop
+
+    return {
+        "case_id": batch["case_ids"],
+        "R1": R1,
+        "R2": R2,
+        "max_moment": max_moment,
+        "max_shear": max_shear,
+        "max_bending_stress": max_bending_stress,
+        "max_shear_stress": max_shear_stress,
+        "max_deflection": max_deflection,
+        "x_max_deflection": x_max_deflection,
+    }
+
+"""-----------------------------------------------------------------------------------------------------------------"""
+
+def write_batch_results(filename, results_data):
+    """
+    Write batch results to one consolidated CSV table, one row per case.
+    
+    Args:
+    filename (str): Name of the output CSV file
+    results_data (dict): Dictionary of result columns from calculate_batch_results
+    """
+    try:
+        fieldnames = list(results_data.keys())
+        columns = [results_data[key] if key == "case_id" else results_data[key].tolist() for key in fieldnames]
+        with open(filename, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            writer.writerows(zip(*columns))
+        print(f"Results successfully written to {filename}")
+
+    except FileNotFoundError:
+        print(f"Error: The file {filename} was not found.")
+
+    except Exception as e:
+        print(f"An error occurred while writing the results: {str(e)}")
+
+"""-----------------------------------------------------------------------------------------------------------------"""
+
+def main_batch(input_file="Project1/beam_batch_data.csv", output_file="beam_batch_results.csv"):
+    try:
+        batch = read_batch_beam_data(input_file)
+        results = calculate_batch_results(batch)
+        write_batch_results(output_file, results)
+        print(f"{len(results['case_id'])} cases written to {output_file}")
+
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+
+"""-----------------------------------------------------------------------------------------------------------------"""
+
+def _evaluate_section_chunk(args):
+    """
+    Evaluate one chunk of the section sweep (runs inside a worker process).
+    
+    Args:
+    args (tuple): (widths, heights, moduli, max_moment, max_shear, unit_deflection, limits)
+    
+    Returns:
+    tuple: (indices of feasible sections, their bending stress, shear stress and deflection)
+    """
+    widths, heights, moduli, max_moment, max_shear, unit_deflection, limits = args
+    stress_limit, shear_limit, deflection_limit = limits
+
+    moment_of_inertia = (widths * heights**3) / 12
+    y_max = heights / 2
+    first_moment = (widths * heights**2) / 8
+    bending_stress = max_moment * y_max / moment_of_inertia
+    shear_stress = max_shear * first_moment / (moment_of_inertia * widths)
+    # deflection scales with 1 / (E * I), so only the unit curve's extreme is needed
+    deflection = unit_deflection / (moduli * moment_of_inertia)
+
+    feasible = ((np.abs(bending_stress) <= stress_limit)
+                & (np.abs(shear_stress) <= shear_limit)
+                & (np.abs(deflection) <= deflection_limit))
+    idx = np.flatnonzero(feasible)
+    return idx, bending_stress[idx], shear_stress[idx], deflection[idx]
+
+"""-----------------------------------------------------------------------------------------------------------------"""
+
+def sweep_sections(length, loads, widths, heights, moduli, densities, stress_limit, shear_limit, deflection_limit,
+                   resolution=0.01, workers=None, chunk_size=None):
+    """
+    Search a width x height x material grid for rectangular sections meeting the limits.
+    
+    The load-side results (max moment, max shear and the deflection curve for
+    E * I = 1) do not depend on the section, so they are computed once and
+    shared by every grid point. The grid is split into chunks (about four per
+    worker by default, so even small grids use every core) that are
+    evaluated on a process pool.
+    
+    Args:
+    length (float): Length of the beam
+    loads (list): List of (position, magnitude) tuples for each load
+    widths, heights (array-like): Values to sweep for each dimension
+    moduli, densities (array-like): Elastic modulus and density of each material
+    stress_limit (float): Allowable bending stress
+    shear_limit (float): Allowable shear stress
+    deflection_limit (float): Allowable magnitude of the max deflection
+    resolution (float): Spacing between deflection stations along the beam
+    workers (int): Number of worker processes (None uses all cores, 1 runs in-process)
+    chunk_size (int): Number of grid points per task (None gives each worker about 4 tasks)
+    
+    Returns:
+    dict: Pareto set of the feasible sections (lightest mass vs smallest deflection),
+    sorted by mass, with columns width, height, elastic_modulus, density, area,
+    mass, max_bending_stress, max_shear_stress and max_deflection
+    """
+    diagram = build_shear_moment_diagram(length, loads)
+    x_values, unit_curve, unit_deflection, x_max = calculate_deflection_curve(length, loads, 1.0, 1.0, resolution)
+
+    W, H, M = np.meshgrid(np.asarray(widths, dtype=float), np.asarray(heights, dtype=float),
+                          np.arange(len(moduli)), indexing="ij")
+    W, H, M = W.ravel(), H.ravel(), M.ravel()
+    E = np.asarray(moduli, dtype=float)[M]
+    rho = np.asarray(densities, dtype=float)[M]
+    limits = (stress_limit, shear_limit, deflection_limit)
+
+    n_workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, -(-W.size // (4 * n_workers)))
+    starts = range(0, W.size, chunk_size)
+    tasks = [(W[i:i + chunk_size], H[i:i + chunk_size], E[i:i + chunk_size],
+              diagram["max_moment"], diagram["max_shear"], unit_deflection, limits) for i in starts]
+
+    if n_workers == 1 or len(tasks) <= 1:
+        chunks = list(map(_evaluate_section_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            chunks = list(pool.map(_evaluate_section_chunk, tasks))
+
+    idx = np.concatenate([start + chunk[0] for start, chunk in zip(starts, chunks)] + [np.zeros(0, dtype=int)])
+    bending = np.concatenate([chunk[1] for chunk in chunks] + [np.zeros(0)])
+    shear = np.concatenate([chunk[2] for chunk in chunks] + [np.zeros(0)])
+    deflection = np.concatenate([chunk[3] for chunk in chunks] + [np.zeros(0)])
+    area = W[idx] * H[idx]
+    mass = area * rho[idx] * length
+
+    # Pareto front: walking up in mass, keep a section only if it deflects less than every lighter one
+    order = np.lexsort((np.abs(deflection), mass))
+    abs_deflection = np.abs(deflection[order])
+    best_before = np.minimum.accumulate(np.concatenate(([np.inf], abs_deflection[:-1])))
+    front = order[abs_deflection < best_before]
+
+    return {
+        "width": W[idx][front],
+        "height": H[idx][front],
+        "elastic_modulus": E[idx][front],
+        "density": rho[idx][front],
+        "area": area[front],
+        "mass": mass[front],
+        "max_bending_stress": bending[front],
+        "max_shear_stress": shear[front],
+        "max_deflection": deflection[front],
+    }
+
+"""-----------------------------------------------------------------------------------------------------------------"""
+
+def main_sweep(input_file="Project1/beam_data.csv", output_file="beam_sweep_results.csv"):
+    try:
+        length, width, height, elastic_modulus, loads = read_beam_data(input_file)
+
+        # design space and allowables
+        widths = np.linspace(0.02, 0.30, 57)
+        heights = np.linspace(0.02, 0.40, 77)
+        moduli = [69e9, 110e9, 200e9]  # aluminium, titanium, steel (Pa)
+        densities = [2700, 4500, 7850]  # aluminium, titanium, steel (kg/m^3)
+        stress_limit = 250e6  # Pa
+        shear_limit = 145e6  # Pa
+        deflection_limit = length / 360  # m
+
+        pareto = sweep_sections(length, loads, widths, heights, moduli, densities,
+                                stress_limit, shear_limit, deflection_limit)
+
+        with open(output_file, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(list(pareto.keys()))
+            writer.writerows(zip(*[column.tolist() for column in pareto.values()]))
+        print(f"{len(pareto['area'])} Pareto-optimal sections written to {output_file}")
+
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+
+"""-----------------------------------------------------------------------------------------------------------------"""
+
 def main():
     input_file = "Project1/beam_data.csv"
     output_file = "beam_analysis_results.csv"
@@ -284,4 +672,11 @@ def main():
         print(f"An error occurred: {str(e)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # python 2_template_Kret.py --batch [input.csv] [output.csv]
+    # python 2_template_Kret.py --sweep [input.csv] [output.csv]
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        main_batch(*sys.argv[2:4])
+    elif len(sys.argv) > 1 and sys.argv[1] == "--sweep":
+        main_sweep(*sys.argv[2:4])
+    else:
+        main()
\ No newline at end of file